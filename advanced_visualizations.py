@@ -3,87 +3,207 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
+from functools import lru_cache, wraps
 from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 import base64
 from io import BytesIO
 
-def create_revenue_chart(df, companies=None):
-    """Create a line chart for revenue over time"""
+# Try to import numba safely; the batch forecast kernel works without it
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Groupby objects keyed by dataframe identity so a page render that draws
+# several charts for the same dataframe only partitions it once
+_GROUPS = {}
+
+# Monetary columns are stored in millions, well within float32 precision;
+# halving the dtype halves memory bandwidth on every downstream vector pass
+_NUMERIC_COLS = [
+    'Total Revenue (in millions)',
+    'Net Income (in millions)',
+    'Total Assets (in millions)',
+    'Total Liabilities (in millions)',
+    'Cash Flow from Operating Activities (in millions)'
+]
+
+@lru_cache(maxsize=64)
+def _company_slice(df_id, company):
+    """Return the pre-sorted rows for one company in float32 numerics"""
+    sub = _GROUPS[df_id].get_group(company).sort_values('Fiscal Year')
+    float_cols = [col for col in _NUMERIC_COLS if col in sub.columns]
+    sub[float_cols] = sub[float_cols].astype(np.float32)
+    return sub
+
+def _get_company_data(df, company):
+    """Get a company's rows sorted by fiscal year, grouping the dataframe only once"""
+    df_id = id(df)
+    if df_id not in _GROUPS:
+        # A new dataframe invalidates slices cached for the old one
+        _GROUPS.clear()
+        _company_slice.cache_clear()
+        _GROUPS[df_id] = df.groupby('Company', sort=False)
+    return _company_slice(df_id, company)
+
+# Short display names for the fixed metric vocabulary, so hot chart paths do
+# a dict lookup instead of a split/strip per trace
+_METRIC_SHORT = {
+    'Total Revenue (in millions)': 'Total Revenue',
+    'Net Income (in millions)': 'Net Income',
+    'Total Assets (in millions)': 'Total Assets',
+    'Total Liabilities (in millions)': 'Total Liabilities',
+    'Cash Flow from Operating Activities (in millions)': 'Cash Flow from Operating Activities',
+    'ROA (%)': 'ROA',
+    'Profit Margin (%)': 'Profit Margin',
+    'Debt-to-Asset Ratio': 'Debt-to-Asset Ratio'
+}
+
+# Above this many points per series, draw lines only; an SVG marker per data
+# point is one of the dominant rendering costs in long histories
+_MAX_MARKER_POINTS = 30
+
+def _series_mode(n_points):
+    """Choose the scatter mode based on series length"""
+    return 'lines' if n_points > _MAX_MARKER_POINTS else 'lines+markers'
+
+def _metric_label(metric):
+    """Short display name for a metric column"""
+    label = _METRIC_SHORT.get(metric)
+    if label is None:
+        label = metric.split('(')[0].strip()
+    return label
+
+# Content hashes computed once per dataframe identity; building a figure
+# costs tens of milliseconds, a cache hit is a dict lookup. Each entry
+# pins the frame it hashed: ids are only unique among live objects, so
+# without the reference a recycled address could serve a stale hash for a
+# different frame
+_DF_VERSIONS = {}
+
+def _df_version(df):
+    """Content hash for a dataframe, computed once per dataframe identity"""
+    df_id = id(df)
+    entry = _DF_VERSIONS.get(df_id)
+    if entry is None:
+        _DF_VERSIONS.clear()
+        entry = (df, int(pd.util.hash_pandas_object(df, index=False).sum()))
+        _DF_VERSIONS[df_id] = entry
+    return entry[1]
+
+def _hashable(value):
+    """Turn list arguments (company/metric selections) into cache-key tuples"""
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+def _figure_cache(func):
+    """Memoize a chart builder on the dataframe version and its other arguments"""
+    cache = {}
+
+    @wraps(func)
+    def wrapper(df, *args, **kwargs):
+        key = (_df_version(df),
+               tuple(_hashable(arg) for arg in args),
+               tuple((name, _hashable(value)) for name, value in sorted(kwargs.items())))
+        if key not in cache:
+            if len(cache) >= 128:
+                cache.clear()
+            cache[key] = func(df, *args, **kwargs)
+        return cache[key]
+
+    return wrapper
+
+def _ensure_categorical(df):
+    """Make the Company column categorical so isin/equality compare integer codes, not strings"""
+    if df['Company'].dtype.name != 'category':
+        df = df.assign(Company=df['Company'].astype('category'))
+    return df
+
+def _line_chart(df, y_col, title, companies=None):
+    """Create a per-company line chart for one metric over time"""
     if companies:
+        df = _ensure_categorical(df)
         df = df[df['Company'].isin(companies)]
-    
+
+    y_label = _metric_label(y_col) + ' (in millions)'
     fig = px.line(
-        df, 
-        x='Fiscal Year', 
-        y='Total Revenue (in millions)', 
+        df,
+        x='Fiscal Year',
+        y=y_col,
         color='Company',
-        markers=True,
-        title='Revenue Over Time',
-        labels={'Total Revenue (in millions)': 'Revenue (in millions)', 'Fiscal Year': 'Year'}
+        markers=len(df) <= _MAX_MARKER_POINTS,
+        render_mode='webgl',
+        title=title,
+        labels={y_col: y_label, 'Fiscal Year': 'Year'}
     )
     fig.update_layout(
         xaxis_title='Fiscal Year',
-        yaxis_title='Revenue (in millions)',
+        yaxis_title=y_label,
         legend_title='Company',
         hovermode='x unified'
     )
     return fig
 
+@_figure_cache
+def create_revenue_chart(df, companies=None):
+    """Create a line chart for revenue over time"""
+    return _line_chart(df, 'Total Revenue (in millions)', 'Revenue Over Time', companies)
+
+@_figure_cache
 def create_net_income_chart(df, companies=None):
     """Create a line chart for net income over time"""
+    return _line_chart(df, 'Net Income (in millions)', 'Net Income Over Time', companies)
+
+def create_revenue_and_income(df, companies=None):
+    """Create the revenue and net income charts together, filtering the dataframe only once"""
     if companies:
+        df = _ensure_categorical(df)
         df = df[df['Company'].isin(companies)]
-    
-    fig = px.line(
-        df, 
-        x='Fiscal Year', 
-        y='Net Income (in millions)', 
-        color='Company',
-        markers=True,
-        title='Net Income Over Time',
-        labels={'Net Income (in millions)': 'Net Income (in millions)', 'Fiscal Year': 'Year'}
+    return (
+        _line_chart(df, 'Total Revenue (in millions)', 'Revenue Over Time'),
+        _line_chart(df, 'Net Income (in millions)', 'Net Income Over Time')
     )
-    fig.update_layout(
-        xaxis_title='Fiscal Year',
-        yaxis_title='Net Income (in millions)',
-        legend_title='Company',
-        hovermode='x unified'
-    )
-    return fig
 
+@_figure_cache
 def create_financial_ratio_chart(df, company):
     """Create financial ratios visualization"""
-    company_data = df[df['Company'] == company].sort_values('Fiscal Year')
-    
-    # Calculate ratios if not already present
-    if 'ROA (%)' not in company_data.columns:
-        company_data['ROA (%)'] = (company_data['Net Income (in millions)'] / company_data['Total Assets (in millions)']) * 100
-    
-    if 'Profit Margin (%)' not in company_data.columns:
-        company_data['Profit Margin (%)'] = (company_data['Net Income (in millions)'] / company_data['Total Revenue (in millions)']) * 100
-    
-    if 'Debt-to-Asset Ratio' not in company_data.columns:
-        company_data['Debt-to-Asset Ratio'] = company_data['Total Liabilities (in millions)'] / company_data['Total Assets (in millions)']
-    
+    company_data = _get_company_data(df, company)
+
+    # Pull the raw columns once and compute the ratios as NumPy arrays,
+    # avoiding per-column dataframe assignments and index alignment
+    years = company_data['Fiscal Year'].to_numpy(dtype=np.int32)
+    net_income = company_data['Net Income (in millions)'].to_numpy()
+    revenue = company_data['Total Revenue (in millions)'].to_numpy()
+    assets = company_data['Total Assets (in millions)'].to_numpy()
+    liabilities = company_data['Total Liabilities (in millions)'].to_numpy()
+
+    # The slices are float32 already, so the ratios stay float32 end to end
+    roa = (net_income / assets) * 100
+    profit_margin = (net_income / revenue) * 100
+    debt_ratio = liabilities / assets
+
     # Create subplots with 3 rows
-    fig = make_subplots(rows=3, cols=1, 
+    fig = make_subplots(rows=3, cols=1,
                        subplot_titles=("Return on Assets (%)", "Profit Margin (%)", "Debt-to-Asset Ratio"),
                        vertical_spacing=0.1)
-    
-    # Add traces for each ratio
+
+    # Add traces for each ratio; Scattergl renders through WebGL, which stays
+    # responsive when a dashboard shows ratio charts for many companies at once
+    mode = _series_mode(len(years))
     fig.add_trace(
-        go.Scatter(x=company_data['Fiscal Year'], y=company_data['ROA (%)'], mode='lines+markers', name='ROA (%)'),
+        go.Scattergl(x=years, y=roa, mode=mode, name='ROA (%)'),
         row=1, col=1
     )
-    
+
     fig.add_trace(
-        go.Scatter(x=company_data['Fiscal Year'], y=company_data['Profit Margin (%)'], mode='lines+markers', name='Profit Margin (%)'),
+        go.Scattergl(x=years, y=profit_margin, mode=mode, name='Profit Margin (%)'),
         row=2, col=1
     )
-    
+
     fig.add_trace(
-        go.Scatter(x=company_data['Fiscal Year'], y=company_data['Debt-to-Asset Ratio'], mode='lines+markers', name='Debt-to-Asset Ratio'),
+        go.Scattergl(x=years, y=debt_ratio, mode=mode, name='Debt-to-Asset Ratio'),
         row=3, col=1
     )
     
@@ -97,37 +217,43 @@ def create_financial_ratio_chart(df, company):
     
     return fig
 
+@_figure_cache
 def create_performance_comparison(df, companies, metric='Total Revenue (in millions)'):
     """Create a performance comparison chart"""
     if not companies or len(companies) < 2:
         return None
-    
-    # Filter dataframe for selected companies
-    filtered_df = df[df['Company'].isin(companies)].sort_values(['Company', 'Fiscal Year'])
-    
-    # Create the comparison chart
-    fig = px.bar(
-        filtered_df,
-        x='Fiscal Year',
-        y=metric,
-        color='Company',
+
+    # Filter to the needed columns and sort only by the x-axis; px.bar would
+    # re-group by Company anyway, so add one bar trace per group directly
+    df = _ensure_categorical(df)
+    filtered_df = df.loc[df['Company'].isin(companies), ['Company', 'Fiscal Year', metric]]
+    filtered_df = filtered_df.sort_values('Fiscal Year', kind='stable')
+
+    fig = go.Figure()
+    for company, group in filtered_df.groupby('Company', sort=False, observed=True):
+        fig.add_trace(
+            go.Bar(
+                x=group['Fiscal Year'].to_numpy(dtype=np.int32),
+                y=group[metric].to_numpy(dtype=np.float32),
+                name=str(company)
+            )
+        )
+
+    fig.update_layout(
         barmode='group',
         title=f'Comparison of {metric} Among Companies',
-        labels={metric: metric.split('(')[0].strip()}
-    )
-    
-    fig.update_layout(
         xaxis_title='Fiscal Year',
-        yaxis_title=metric.split('(')[0].strip(),
+        yaxis_title=_metric_label(metric),
         legend_title='Company',
         hovermode='x unified'
     )
     
     return fig
 
+@_figure_cache
 def create_forecast_chart(df, company, metric='Total Revenue (in millions)', periods=2):
     """Create a forecast chart using simple linear projection"""
-    company_data = df[df['Company'] == company].sort_values('Fiscal Year')
+    company_data = _get_company_data(df, company)
     
     if len(company_data) < 2:
         return None
@@ -136,46 +262,59 @@ def create_forecast_chart(df, company, metric='Total Revenue (in millions)', per
     years = company_data['Fiscal Year'].values
     values = company_data[metric].values
     
-    # Calculate linear regression (simple forecast)
-    x = np.array(range(len(years)))
-    slope, intercept = np.polyfit(x, values, 1)
-    
-    # Generate forecast years and values
-    last_year = years[-1]
-    forecast_years = list(years) + [last_year + i + 1 for i in range(periods)]
-    forecast_x = np.array(range(len(years) + periods))
+    # Calculate linear regression (simple forecast) in closed form;
+    # polyfit would set up a least-squares solve that is overkill for degree 1.
+    # One arange covers both the fit grid and the forecast grid
+    forecast_x = np.arange(len(years) + periods)
+    x = forecast_x[:len(years)]
+    x_mean = x.mean()
+    y_mean = values.mean()
+    dx = x - x_mean
+    slope = (dx * (values - y_mean)).sum() / (dx * dx).sum()
+    intercept = y_mean - slope * x_mean
+
+    # Generate forecast years and values in one contiguous array instead of
+    # concatenating Python lists of boxed ints
+    forecast_years = np.concatenate([years, years[-1] + 1 + np.arange(periods, dtype=years.dtype)])
     forecast_values = slope * forecast_x + intercept
     
-    # Create dataframe for visualization
-    forecast_df = pd.DataFrame({
-        'Year': forecast_years,
-        'Value': forecast_values,
-        'Type': ['Historical'] * len(years) + ['Forecast'] * periods
-    })
-    
-    # Plot the forecast
-    fig = px.line(
-        forecast_df, 
-        x='Year', 
-        y='Value', 
-        color='Type',
-        title=f'Forecast for {company} - {metric}',
-        markers=True,
-        line_dash='Type'
+    # Plot the two segments as direct traces; there is no need to assemble
+    # a throwaway dataframe just so px can split on a Type column
+    n_years = len(years)
+    fig = go.Figure()
+
+    fig.add_trace(
+        go.Scattergl(
+            x=forecast_years[:n_years],
+            y=forecast_values[:n_years],
+            mode='lines+markers',
+            name='Historical'
+        )
     )
-    
+
+    fig.add_trace(
+        go.Scattergl(
+            x=forecast_years[n_years:],
+            y=forecast_values[n_years:],
+            mode='lines+markers',
+            line=dict(dash='dash'),
+            name='Forecast'
+        )
+    )
+
     # Add the actual historical values
     fig.add_trace(
-        go.Scatter(
-            x=years, 
-            y=values, 
+        go.Scattergl(
+            x=years,
+            y=values,
             mode='markers',
             marker=dict(size=10),
             name='Actual'
         )
     )
-    
+
     fig.update_layout(
+        title=f'Forecast for {company} - {metric}',
         xaxis_title='Year',
         yaxis_title=metric,
         hovermode='x unified'
@@ -183,27 +322,71 @@ def create_forecast_chart(df, company, metric='Total Revenue (in millions)', per
     
     return fig
 
+def _batch_forecast(values2d, periods):
+    """Fit a linear trend to each row of values2d and extend it by the given periods"""
+    n_series, n_years = values2d.shape
+    out = np.empty((n_series, n_years + periods), values2d.dtype)
+    x = np.arange(n_years + periods, dtype=values2d.dtype)
+    x_mean = x[:n_years].mean()
+    dx = x[:n_years] - x_mean
+    denom = (dx * dx).sum()
+    for g in range(n_series):
+        y = values2d[g]
+        y_mean = y.mean()
+        slope = (dx * (y - y_mean)).sum() / denom
+        intercept = y_mean - slope * x_mean
+        out[g] = slope * x + intercept
+    return out
+
+# Compile the kernel loop when numba is installed
+if NUMBA_AVAILABLE:
+    _batch_forecast = numba.njit(cache=True)(_batch_forecast)
+
+def create_forecast_grid(df, companies, metrics, periods=2):
+    """Forecast several metrics for several companies in one batched fit per company
+
+    Returns a dict mapping (company, metric) to a (years, values) pair that
+    covers the historical years plus the forecast periods.
+    """
+    forecasts = {}
+    for company in companies:
+        company_data = _get_company_data(df, company)
+        if len(company_data) < 2:
+            continue
+
+        years = company_data['Fiscal Year'].to_numpy()
+        forecast_years = np.concatenate([years, years[-1] + np.arange(1, periods + 1)])
+
+        # One contiguous (metrics x years) array so the kernel fits all series at once
+        values2d = np.ascontiguousarray(company_data[list(metrics)].to_numpy(dtype=np.float64).T)
+        fitted = _batch_forecast(values2d, periods)
+
+        for i, metric in enumerate(metrics):
+            forecasts[(company, metric)] = (forecast_years, fitted[i])
+
+    return forecasts
+
 def create_financial_wordcloud(text):
     """Create a wordcloud of financial terms"""
-    wordcloud = WordCloud(width=800, height=400, background_color='white', colormap='viridis', max_words=100).generate(text)
-    
-    # Create a matplotlib figure
-    plt.figure(figsize=(10, 5))
-    plt.imshow(wordcloud, interpolation='bilinear')
-    plt.axis('off')
-    
-    # Convert matplotlib figure to base64 string
+    # Built per call: generate() mutates the instance's layout, and
+    # Streamlit serves concurrent sessions on separate threads, so a
+    # shared module-level WordCloud can hand one user another's image
+    wordcloud = WordCloud(width=800, height=400, background_color='white',
+                          colormap='viridis', max_words=100).generate(text)
+
+    # Render the PIL image directly instead of round-tripping through matplotlib;
+    # a light compression level keeps PNG encoding cheap
+    image = wordcloud.to_image()
     buffer = BytesIO()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
+    image.save(buffer, format='PNG', compress_level=1)
     image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    plt.close()
-    
+
     return f"data:image/png;base64,{image_base64}"
 
+@_figure_cache
 def create_interactive_chart(df, company, metrics=None):
     """Create a multi-metric interactive chart"""
-    company_data = df[df['Company'] == company].sort_values('Fiscal Year')
+    company_data = _get_company_data(df, company)
     
     if metrics is None:
         metrics = [
@@ -219,10 +402,10 @@ def create_interactive_chart(df, company, metrics=None):
         if i == 0:
             # First metric on primary y-axis
             fig.add_trace(
-                go.Scatter(
-                    x=company_data['Fiscal Year'],
-                    y=company_data[metric],
-                    name=metric.split('(')[0].strip(),
+                go.Scattergl(
+                    x=company_data['Fiscal Year'].to_numpy(dtype=np.int32),
+                    y=company_data[metric].to_numpy(dtype=np.float32),
+                    name=_metric_label(metric),
                     mode='lines+markers'
                 ),
                 secondary_y=False
@@ -230,10 +413,10 @@ def create_interactive_chart(df, company, metrics=None):
         else:
             # Additional metrics on secondary y-axis
             fig.add_trace(
-                go.Scatter(
-                    x=company_data['Fiscal Year'],
-                    y=company_data[metric],
-                    name=metric.split('(')[0].strip(),
+                go.Scattergl(
+                    x=company_data['Fiscal Year'].to_numpy(dtype=np.int32),
+                    y=company_data[metric].to_numpy(dtype=np.float32),
+                    name=_metric_label(metric),
                     mode='lines+markers'
                 ),
                 secondary_y=True
@@ -249,45 +432,63 @@ def create_interactive_chart(df, company, metrics=None):
     fig.update_xaxes(title_text="Fiscal Year")
     
     # Set y-axes titles
-    fig.update_yaxes(title_text=metrics[0].split('(')[0].strip(), secondary_y=False)
+    fig.update_yaxes(title_text=_metric_label(metrics[0]), secondary_y=False)
     if len(metrics) > 1:
-        fig.update_yaxes(title_text=metrics[1].split('(')[0].strip(), secondary_y=True)
+        fig.update_yaxes(title_text=_metric_label(metrics[1]), secondary_y=True)
     
     return fig
 
+@_figure_cache
 def create_growth_chart(df, company):
     """Create a chart showing growth rates"""
-    company_data = df[df['Company'] == company].sort_values('Fiscal Year')
-    
-    # Calculate growth rates if they don't exist
-    if 'Revenue Growth (%)' not in company_data.columns:
-        company_data['Revenue Growth (%)'] = company_data['Total Revenue (in millions)'].pct_change() * 100
-    
-    if 'Net Income Growth (%)' not in company_data.columns:
-        company_data['Net Income Growth (%)'] = company_data['Net Income (in millions)'].pct_change() * 100
-    
-    # Drop the first row which will have NaN for growth rates
-    company_data = company_data.dropna(subset=['Revenue Growth (%)'])
-    
-    if len(company_data) == 0:
+    company_data = _get_company_data(df, company)
+
+    if len(company_data) < 2:
         return None
-    
+
+    years = company_data['Fiscal Year'].to_numpy(dtype=np.int32)
+
+    # Compute growth with one vectorized divide over the raw arrays when a
+    # column is missing; pct_change would allocate shifted intermediates
+    # plus a NaN-fill pass for the same result. Each series falls back
+    # independently, since a frame may carry only one precomputed column.
+    if 'Revenue Growth (%)' in company_data.columns:
+        revenue_growth = company_data['Revenue Growth (%)'].to_numpy(dtype=np.float32)
+    else:
+        revenue = company_data['Total Revenue (in millions)'].to_numpy()
+        revenue_growth = np.empty(len(revenue), dtype=np.float32)
+        revenue_growth[0] = np.nan
+        revenue_growth[1:] = (revenue[1:] / revenue[:-1] - 1.0) * 100.0
+
+    if 'Net Income Growth (%)' in company_data.columns:
+        income_growth = company_data['Net Income Growth (%)'].to_numpy(dtype=np.float32)
+    else:
+        income = company_data['Net Income (in millions)'].to_numpy()
+        income_growth = np.empty(len(income), dtype=np.float32)
+        income_growth[0] = np.nan
+        income_growth[1:] = (income[1:] / income[:-1] - 1.0) * 100.0
+
+    # Drop the first year, which has no growth figure
+    years = years[1:]
+    revenue_growth = revenue_growth[1:]
+    income_growth = income_growth[1:]
+
     # Create figure
     fig = go.Figure()
-    
+
     fig.add_trace(
         go.Bar(
-            x=company_data['Fiscal Year'],
-            y=company_data['Revenue Growth (%)'],
+            x=years,
+            y=revenue_growth,
             name='Revenue Growth (%)',
             marker_color='blue'
         )
     )
-    
+
     fig.add_trace(
         go.Bar(
-            x=company_data['Fiscal Year'],
-            y=company_data['Net Income Growth (%)'],
+            x=years,
+            y=income_growth,
             name='Net Income Growth (%)',
             marker_color='green'
         )
@@ -3,30 +3,47 @@ from subprocess import Popen, PIPE
 import os
 import sys
 
+# The response body is constant, so encode it once at module load
+_MESSAGE = ("This endpoint will redirect to a Streamlit app. Please deploy using "
+            "Streamlit Cloud or another provider that supports long-running "
+            "processes.").encode()
+
 class handler(BaseHTTPRequestHandler):
-    def do_GET(self):
+    def _send_head(self):
         self.send_response(200)
         self.send_header('Content-type', 'text/plain')
+        self.send_header('Content-Length', str(len(_MESSAGE)))
+        # The body is constant, so let browser/CDN caches absorb repeats
+        self.send_header('Cache-Control', 'public, max-age=60')
+        self.end_headers()
+
+    def do_HEAD(self):
+        # Load balancers and readiness probes use HEAD; the default handler
+        # would answer 501 and force a reconnect
+        self._send_head()
+        return
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header('Allow', 'GET, HEAD, OPTIONS')
+        self.send_header('Content-Length', '0')
         self.end_headers()
+        return
+
+    def do_GET(self):
+        self._send_head()
         
-        # Get the current working directory
-        cwd = os.getcwd()
         # Get the directory where this script is located
         script_dir = os.path.dirname(os.path.abspath(__file__))
-        # Go back one directory to get to the project root
+        # Go back one directory to get to the project root; if a subprocess is
+        # ever launched here, pass cwd=project_dir instead of os.chdir, which
+        # is process-global and races under concurrent requests
         project_dir = os.path.abspath(os.path.join(script_dir, ".."))
-        
+
         try:
-            # Change to the project root directory
-            os.chdir(project_dir)
-            
-            # Run Streamlit app
-            message = "This endpoint will redirect to a Streamlit app. Please deploy using Streamlit Cloud or another provider that supports long-running processes."
-            self.wfile.write(message.encode())
-            
+            # Single write of the precomputed blob, no per-request encode
+            self.wfile.write(memoryview(_MESSAGE))
+
         except Exception as e:
             self.wfile.write(str(e).encode())
-        finally:
-            # Change back to the original directory
-            os.chdir(cwd)
         return
\ No newline at end of file
@@ -4,24 +4,142 @@ import plotly.express as px
 import re
 import numpy as np
 import base64
+import hashlib
 import io
-from financial_analysis import (
-    load_data, 
-    analyze_data, 
-    generate_response,
-    get_yfinance_data
-)
-from advanced_visualizations import (
-    create_financial_ratio_chart,
-    create_performance_comparison,
-    create_forecast_chart,
-    create_financial_wordcloud,
-    create_interactive_chart,
-    create_revenue_chart,
-    create_net_income_chart,
-    create_growth_chart
+import os
+from types import SimpleNamespace
+
+# financial_analysis (which pulls yfinance) and advanced_visualizations
+# (which pulls plotly and wordcloud) are imported lazily inside the page
+# branches and cached helpers below, so cold start only pays for the page
+# actually being viewed; sys.modules makes every later import free
+
+# Cached wrappers so Streamlit's rerun-on-every-interaction model doesn't
+# redo disk I/O and the full analysis pipeline on each widget click
+def _shrink(df):
+    # Values in millions fit float32 and fiscal years fit int16; the category
+    # dtype on Company also speeds up every groupby and equality filter
+    for col in df.columns:
+        if col == 'Company':
+            df[col] = df[col].astype('category')
+        elif col == 'Fiscal Year':
+            df[col] = df[col].astype(np.int16)
+        elif df[col].dtype.kind == 'f' or '(in millions)' in col:
+            df[col] = df[col].astype(np.float32)
+    return df
+
+@st.cache_data(show_spinner=False)
+def _load_sample():
+    from financial_analysis import load_data
+    return _shrink(load_data())
+
+@st.cache_data
+def _load_uploaded(file_bytes):
+    try:
+        # The pyarrow engine parses columns in parallel; it has no thousands-
+        # separator support, so convert any numeric columns it left as strings
+        df = pd.read_csv(io.BytesIO(file_bytes), engine='pyarrow')
+        for col in df.columns:
+            if df[col].dtype == object:
+                converted = pd.to_numeric(df[col].str.replace(',', '', regex=False), errors='coerce')
+                # Convert when every non-null entry parsed; requiring *all*
+                # entries to parse would leave a numeric column with any
+                # missing cell stuck as strings
+                if converted.notna().equals(df[col].notna()):
+                    df[col] = converted
+        return _shrink(df)
+    except Exception as e:
+        print(f"pyarrow CSV parse failed, falling back to default engine: {str(e)}")
+        return _shrink(pd.read_csv(io.BytesIO(file_bytes), thousands=','))
+
+# Columns every uploaded CSV must contain; built once at import instead of
+# on each rerun of the upload page
+REQUIRED_COLUMNS = (
+    'Company', 'Fiscal Year', 'Total Revenue (in millions)',
+    'Net Income (in millions)', 'Total Assets (in millions)',
+    'Total Liabilities (in millions)', 'Cash Flow from Operating Activities (in millions)'
 )
 
+def _df_key(df):
+    # Stable 16-byte digest of the dataframe's content, so re-uploading the
+    # same file or re-fetching the same tickers reuses the cached analysis
+    return hashlib.blake2b(
+        pd.util.hash_pandas_object(df, index=True).values.tobytes(),
+        digest_size=16
+    ).digest()
+
+@st.cache_data(max_entries=8)
+def _enrich(df_key, _df):
+    # Growth and ratio columns as a cached *return value*, keyed on the raw
+    # frame's content digest. analyze_data used to add these by mutating the
+    # frame in place, which a cache hit silently skips, so the enriched frame
+    # is what gets stored in session state.
+    from financial_analysis import enrich_financial_data
+    return enrich_financial_data(_df)
+
+@st.cache_data(max_entries=8)
+def _analyze(df_key, _df):
+    # Keyed on the content digest only; the underscore tells Streamlit not to
+    # hash the frame itself a second time
+    from financial_analysis import analyze_data
+    return analyze_data(_df)
+
+@st.cache_data
+def _summary(df):
+    # One cached pass over the key columns instead of four separate
+    # aggregations on every rerun of the upload page
+    fiscal_years = df['Fiscal Year']
+    return {
+        'n_companies': df['Company'].nunique(),
+        'year_min': int(fiscal_years.min()),
+        'year_max': int(fiscal_years.max()),
+        'rows': len(df)
+    }
+
+@st.cache_data
+def _companies(df):
+    # The company list is re-read on several pages each rerun; compute once per dataframe
+    return df['Company'].unique().tolist()
+
+@st.cache_data
+def _soa(df):
+    # One factorized, column-oriented view shared by every page: the frame
+    # sorted by (Company, Fiscal Year), integer company codes, and contiguous
+    # float32/int16 arrays for the monetary columns and years. Sorting and
+    # factorizing happen once per dataframe instead of once per helper.
+    d = df.sort_values(['Company', 'Fiscal Year'], kind='stable').reset_index(drop=True)
+    codes, companies = pd.factorize(d['Company'])
+    metric_cols = [c for c in REQUIRED_COLUMNS[2:] if c in d.columns]
+    return SimpleNamespace(
+        df=d,
+        codes=codes.astype(np.int32),
+        companies=companies,
+        vals=d[metric_cols].to_numpy(np.float32),
+        years=d['Fiscal Year'].to_numpy(np.int16)
+    )
+
+@st.cache_data
+def _company_indexer(df):
+    # Row positions per company *within the sorted _soa frame*, gathered once
+    # so per-rerun filtering is an O(groupsize) iloc pull instead of a full
+    # equality scan over the Company column
+    soa = _soa(df)
+    return {company: np.flatnonzero(soa.codes == i)
+            for i, company in enumerate(soa.companies)}
+
+@st.cache_data
+def _latest_rows(df):
+    # One latest-year row per company, indexed for O(1) lookups per rerun;
+    # the _soa frame is already sorted, so the last row of each group wins
+    return _soa(df).df.drop_duplicates('Company', keep='last').set_index('Company')
+
+@st.cache_data(ttl=900, show_spinner=False)
+def _cached_yf(tickers_key):
+    # Keyed on a normalized ticker tuple; repeat fetches within 15 minutes
+    # are served from memory instead of hitting Yahoo Finance again
+    from financial_analysis import get_yfinance_data
+    return get_yfinance_data(list(tickers_key))
+
 # Set page configuration
 st.set_page_config(
     page_title="Financial Analysis Chatbot",
@@ -30,6 +148,32 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Logo markup is static, so read and base64-encode the file once per process
+# instead of on every rerun
+@st.cache_resource
+def _logo_html():
+    # Try multiple possible locations for the logo file
+    possible_paths = [
+        "assets/financial_icon.svg",
+        "./assets/financial_icon.svg",
+        "../assets/financial_icon.svg",
+        "financial_icon.svg",
+        "./financial_icon.svg"
+    ]
+
+    for path in possible_paths:
+        # A plain existence check avoids raising and catching an exception
+        # per missing candidate path
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                svg = f.read()
+            b64 = base64.b64encode(svg).decode("utf-8")
+            print(f"Successfully loaded logo from {path}")
+            return f'<img src="data:image/svg+xml;base64,{b64}" class="logo-img">'
+
+    # No logo was found - the caller falls back to text
+    return None
+
 # Add custom icon
 def add_logo():
     st.markdown(
@@ -46,36 +190,14 @@ def add_logo():
         """,
         unsafe_allow_html=True
     )
-    
-    # Try multiple possible locations for the logo file
-    possible_paths = [
-        "assets/financial_icon.svg", 
-        "./assets/financial_icon.svg",
-        "../assets/financial_icon.svg",
-        "financial_icon.svg",
-        "./financial_icon.svg"
-    ]
-    
-    for path in possible_paths:
-        try:
-            with open(path, "r") as f:
-                svg = f.read()
-                b64 = base64.b64encode(svg.encode("utf-8")).decode("utf-8")
-                html = f'<img src="data:image/svg+xml;base64,{b64}" class="logo-img">'
-                st.sidebar.markdown(html, unsafe_allow_html=True)
-                print(f"Successfully loaded logo from {path}")
-                return
-        except:
-            continue
-    
-    # If we get here, no logo was found - use text instead
-    st.sidebar.markdown("## 💹 Financial Analysis")
 
-try:
-    add_logo()
-except Exception as e:
-    print(f"Error adding logo: {str(e)}")
-    st.sidebar.markdown("## 💹 Financial Analysis")
+    html = _logo_html()
+    if html is not None:
+        st.sidebar.markdown(html, unsafe_allow_html=True)
+    else:
+        st.sidebar.markdown("## 💹 Financial Analysis")
+
+add_logo()
 
 # Initialize session state
 if 'df' not in st.session_state:
@@ -122,6 +244,8 @@ if page == "Home":
     
     # Display a sample visualization if data is loaded
     if st.session_state.df is not None:
+        from advanced_visualizations import create_revenue_chart
+
         st.subheader("Sample Visualization")
         fig = create_revenue_chart(st.session_state.df)
         st.plotly_chart(fig, use_container_width=True)
@@ -143,37 +267,38 @@ elif page == "Data Upload":
         
         if uploaded_file is not None:
             try:
-                # Read the uploaded file
-                df = pd.read_csv(uploaded_file, thousands=',')
-                
-                # Verify that the CSV has the required columns
-                required_columns = [
-                    'Company', 'Fiscal Year', 'Total Revenue (in millions)', 
-                    'Net Income (in millions)', 'Total Assets (in millions)',
-                    'Total Liabilities (in millions)', 'Cash Flow from Operating Activities (in millions)'
-                ]
-                
-                missing_columns = [col for col in required_columns if col not in df.columns]
+                # Read the uploaded file (cached on the file bytes)
+                df = _load_uploaded(uploaded_file.getvalue())
                 
+                # Verify that the CSV has the required columns; one hashed set
+                # diff, reported in canonical column order
+                column_set = set(df.columns)
+                missing_columns = [col for col in REQUIRED_COLUMNS if col not in column_set]
+
                 if missing_columns:
                     st.error(f"The uploaded CSV is missing the following required columns: {', '.join(missing_columns)}")
-                    st.info("Please ensure your CSV has the following columns: " + ", ".join(required_columns))
+                    st.info("Please ensure your CSV has the following columns: " + ", ".join(REQUIRED_COLUMNS))
                 else:
-                    # Store the dataframe and analyze it
+                    # Enrich, then store the enriched frame and analyze it;
+                    # both caches share the raw frame's digest as their key
+                    df_key = _df_key(df)
+                    df = _enrich(df_key, df)
                     st.session_state.df = df
-                    st.session_state.analysis_data = analyze_data(df)
+                    st.session_state.analysis_data = _analyze(df_key, df)
                     
                     st.success("Data uploaded and analyzed successfully!")
                     
-                    # Show a preview of the data
+                    # Show a preview of the data; Streamlit's Arrow path only
+                    # streams the rows scrolled into view
                     st.subheader("Data Preview")
-                    st.dataframe(df.head())
+                    st.dataframe(df, use_container_width=True, height=300)
                     
                     # Show some basic statistics
                     st.subheader("Data Summary")
-                    st.write(f"Number of companies: {df['Company'].nunique()}")
-                    st.write(f"Years covered: {df['Fiscal Year'].min()} to {df['Fiscal Year'].max()}")
-                    st.write(f"Total number of records: {len(df)}")
+                    summary = _summary(df)
+                    st.write(f"Number of companies: {summary['n_companies']}")
+                    st.write(f"Years covered: {summary['year_min']} to {summary['year_max']}")
+                    st.write(f"Total number of records: {summary['rows']}")
                     
             except Exception as e:
                 st.error(f"Error processing the uploaded file: {str(e)}")
@@ -182,11 +307,13 @@ elif page == "Data Upload":
     else:  # Use sample data
         if st.button("Load Sample Data"):
             # Load sample data
-            df = load_data()
-            
-            # Store the dataframe and analyze it
+            df = _load_sample()
+
+            # Enrich, then store the enriched frame and analyze it
+            df_key = _df_key(df)
+            df = _enrich(df_key, df)
             st.session_state.df = df
-            st.session_state.analysis_data = analyze_data(df)
+            st.session_state.analysis_data = _analyze(df_key, df)
             
             st.success("Sample data loaded and analyzed successfully!")
             
@@ -201,62 +328,69 @@ elif page == "Company Analysis":
     if st.session_state.df is None:
         st.warning("No data available. Please upload data in the 'Data Upload' tab.")
     else:
+        from advanced_visualizations import (
+            create_financial_ratio_chart,
+            create_forecast_chart,
+            create_growth_chart,
+            create_interactive_chart
+        )
+
         # Get list of companies
-        companies = st.session_state.df['Company'].unique()
+        companies = _companies(st.session_state.df)
         
         # Company selector
         selected_company = st.selectbox("Select a company to analyze:", companies)
         
-        # Filter data for selected company
-        company_data = st.session_state.df[st.session_state.df['Company'] == selected_company]
-        
         # Key financial metrics
         st.subheader("Key Financial Metrics")
         
         # Create columns for metrics
         col1, col2, col3 = st.columns(3)
         
-        # Get the latest year data
-        latest_year = company_data['Fiscal Year'].max()
-        latest_data = company_data[company_data['Fiscal Year'] == latest_year].iloc[0]
-        
+        # Get the latest year data from the cached per-company index
+        latest_data = _latest_rows(st.session_state.df).loc[selected_company]
+
+        # Pre-format the growth deltas in one pass over the Series instead of
+        # repeating the membership/isna/getitem chain for every st.metric call
+        deltas = {
+            col: None if col not in latest_data or pd.isna(latest_data[col])
+            else f"{latest_data[col]:.1f}%"
+            for col in ('Revenue Growth (%)', 'Asset Growth (%)', 'Net Income Growth (%)',
+                        'Liability Growth (%)', 'Cash Flow Growth (%)')
+        }
+
         # Display metrics in columns
         with col1:
             st.metric(
                 label="Revenue (millions)",
                 value=f"${latest_data['Total Revenue (in millions)']:,.0f}",
-                delta=f"{latest_data.get('Revenue Growth (%)', 0):.1f}%" 
-                if 'Revenue Growth (%)' in latest_data and not pd.isna(latest_data['Revenue Growth (%)']) else None
+                delta=deltas['Revenue Growth (%)']
             )
             
             st.metric(
                 label="Total Assets (millions)",
                 value=f"${latest_data['Total Assets (in millions)']:,.0f}",
-                delta=f"{latest_data.get('Asset Growth (%)', 0):.1f}%" 
-                if 'Asset Growth (%)' in latest_data and not pd.isna(latest_data['Asset Growth (%)']) else None
+                delta=deltas['Asset Growth (%)']
             )
         
         with col2:
             st.metric(
                 label="Net Income (millions)",
                 value=f"${latest_data['Net Income (in millions)']:,.0f}",
-                delta=f"{latest_data.get('Net Income Growth (%)', 0):.1f}%" 
-                if 'Net Income Growth (%)' in latest_data and not pd.isna(latest_data['Net Income Growth (%)']) else None
+                delta=deltas['Net Income Growth (%)']
             )
             
             st.metric(
                 label="Total Liabilities (millions)",
                 value=f"${latest_data['Total Liabilities (in millions)']:,.0f}",
-                delta=f"{latest_data.get('Liability Growth (%)', 0):.1f}%" 
-                if 'Liability Growth (%)' in latest_data and not pd.isna(latest_data['Liability Growth (%)']) else None
+                delta=deltas['Liability Growth (%)']
             )
         
         with col3:
             st.metric(
                 label="Cash Flow (millions)",
                 value=f"${latest_data['Cash Flow from Operating Activities (in millions)']:,.0f}",
-                delta=f"{latest_data.get('Cash Flow Growth (%)', 0):.1f}%" 
-                if 'Cash Flow Growth (%)' in latest_data and not pd.isna(latest_data['Cash Flow Growth (%)']) else None
+                delta=deltas['Cash Flow Growth (%)']
             )
             
             # ROA (Return on Assets)
@@ -308,7 +442,7 @@ elif page == "Chatbot":
         st.warning("No data available. Please upload data in the 'Data Upload' tab.")
     else:
         # Get list of companies
-        companies = st.session_state.df['Company'].unique()
+        companies = _companies(st.session_state.df)
         
         # Company selector
         selected_company = st.selectbox("Select a company to query:", companies)
@@ -331,28 +465,29 @@ elif page == "Chatbot":
             - What's the forecast for {company}?
             """.format(company=selected_company))
         
-        # Display chat history
+        # Display chat history through Streamlit's batched chat containers
         for message in st.session_state.chat_history:
-            if message["role"] == "user":
-                st.markdown(f"**You:** {message['content']}")
-            else:
-                st.markdown(f"**Bot:** {message['content']}")
-        
-        # Query input
-        user_query = st.text_input("Your question:", key="user_query")
-        
-        if st.button("Ask") and user_query:
+            with st.chat_message("user" if message["role"] == "user" else "assistant"):
+                st.markdown(message["content"])
+
+        # Query input; chat_input triggers a rerun on submit by itself
+        if user_query := st.chat_input("Your question:"):
+            from financial_analysis import generate_response
+
             # Add user query to chat history
             st.session_state.chat_history.append({"role": "user", "content": user_query})
-            
+
             # Generate response
             response = generate_response(user_query, st.session_state.analysis_data, selected_company)
-            
+
             # Add bot response to chat history
             st.session_state.chat_history.append({"role": "bot", "content": response})
-            
-            # Rerun to display updated chat history
-            st.rerun()
+
+            # Show the new exchange without waiting for the next rerun
+            with st.chat_message("user"):
+                st.markdown(user_query)
+            with st.chat_message("assistant"):
+                st.markdown(response)
 
 # Financial Visualization page
 elif page == "Financial Visualization":
@@ -361,8 +496,17 @@ elif page == "Financial Visualization":
     if st.session_state.df is None:
         st.warning("No data available. Please upload data in the 'Data Upload' tab.")
     else:
+        from advanced_visualizations import (
+            create_financial_ratio_chart,
+            create_forecast_chart,
+            create_growth_chart,
+            create_net_income_chart,
+            create_performance_comparison,
+            create_revenue_chart
+        )
+
         # Get list of companies
-        companies = st.session_state.df['Company'].unique().tolist()
+        companies = _companies(st.session_state.df)
         
         # Select visualization type
         viz_type = st.selectbox(
@@ -482,15 +626,17 @@ elif page == "Real-time Data":
         if st.button("Fetch Data"):
             if tickers:
                 with st.spinner("Fetching financial data from Yahoo Finance..."):
-                    # Get yfinance data
-                    yf_data = get_yfinance_data(tickers)
+                    # Get yfinance data (cached for 15 minutes per ticker set)
+                    yf_data = _cached_yf(tuple(sorted(t.upper() for t in tickers)))
                     
                     if yf_data is not None and not yf_data.empty:
                         st.success(f"Successfully retrieved data for {yf_data['Company'].nunique()} companies.")
                         
-                        # Store the dataframe and analyze it
+                        # Enrich, then store the enriched frame and analyze it
+                        df_key = _df_key(yf_data)
+                        yf_data = _enrich(df_key, yf_data)
                         st.session_state.df = yf_data
-                        st.session_state.analysis_data = analyze_data(yf_data)
+                        st.session_state.analysis_data = _analyze(df_key, yf_data)
                         
                         # Show a preview of the data
                         st.subheader("Data Preview")
@@ -498,6 +644,7 @@ elif page == "Real-time Data":
                         
                         # Show a visualization
                         st.subheader("Revenue Comparison")
+                        from advanced_visualizations import create_revenue_chart
                         fig = create_revenue_chart(yf_data)
                         st.plotly_chart(fig, use_container_width=True)
                     else:
@@ -1,43 +1,67 @@
 import pandas as pd
+import numpy as np
+
+# Numba compiles the growth kernel when available; the plain-Python loop
+# gives the same result without it
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+def _pct_change_grouped(codes, vals, out):
+    """Year-over-year percent change within each company block of pre-sorted rows"""
+    n, k = vals.shape
+    for i in range(n):
+        if i == 0 or codes[i] != codes[i - 1]:
+            for j in range(k):
+                out[i, j] = np.nan
+        else:
+            for j in range(k):
+                prev = vals[i - 1, j]
+                out[i, j] = (vals[i, j] - prev) / prev * 100.0 if prev != 0 else np.nan
+    return out
+
+if NUMBA_AVAILABLE:
+    _pct_change_grouped = njit(cache=True)(_pct_change_grouped)
+
 df = pd.read_csv('Financial_data.csv', thousands=',')
 
 df.head()
 
-df['Revenue Growth (%)'] = df.groupby(['Company'])['Total Revenue (in millions)'].pct_change() * 100
-df['Net Income Growth (%)'] = df.groupby(['Company'])['Net Income (in millions)'].pct_change() * 100
-
-# Group by Company and Year and calculate summary statistics
-grouped = df.groupby(['Company', 'Fiscal Year']).agg({
-    'Total Revenue (in millions)': ['sum', 'mean', 'max', 'min'],
-    'Net Income (in millions)': ['sum', 'mean', 'max', 'min'],
-    'Total Assets (in millions)': ['sum', 'mean', 'max', 'min'],
-    'Total Liabilities (in millions)': ['sum', 'mean', 'max', 'min'],
-    'Cash Flow from Operating Activities (in millions)': ['sum', 'mean', 'max', 'min']
-}).reset_index()
-
-# Calculate year-over-year growth for each financial metric
-df['Revenue Growth (%)'] = df.groupby('Company')['Total Revenue (in millions)'].pct_change() * 100
-df['Net Income Growth (%)'] = df.groupby('Company')['Net Income (in millions)'].pct_change() * 100
-df['Asset Growth (%)'] = df.groupby('Company')['Total Assets (in millions)'].pct_change() * 100
-df['Liability Growth (%)'] = df.groupby('Company')['Total Liabilities (in millions)'].pct_change() * 100
-df['Cash Flow Growth (%)'] = df.groupby('Company')['Cash Flow from Operating Activities (in millions)'].pct_change() * 100
+# Calculate year-over-year growth for each financial metric in a single
+# grouped pass instead of building one GroupBy per column
+metric_cols = [
+    'Total Revenue (in millions)',
+    'Net Income (in millions)',
+    'Total Assets (in millions)',
+    'Total Liabilities (in millions)',
+    'Cash Flow from Operating Activities (in millions)'
+]
+growth_cols = ['Revenue Growth (%)', 'Net Income Growth (%)', 'Asset Growth (%)',
+               'Liability Growth (%)', 'Cash Flow Growth (%)']
+df = df.sort_values(['Company', 'Fiscal Year'], kind='stable', ignore_index=True)
+codes, _ = pd.factorize(df['Company'])
+vals = df[metric_cols].to_numpy(np.float64)
+out = np.empty_like(vals)
+_pct_change_grouped(codes, vals, out)
+df[growth_cols] = out
 
 # Descriptive statistics of the DataFrame
 df.describe()
 
-import matplotlib.pyplot as plt
-
-# Plot revenue growth over the years for each company
-plt.figure(figsize=(10,6))
-for company in df['Company'].unique():
-    company_data = df[df['Company'] == company]
-    plt.plot(company_data['Fiscal Year'], company_data['Revenue Growth (%)'], label=company)
+if __name__ == "__main__":
+    # Plotting only runs when the script is executed directly, so importing
+    # this module never pays matplotlib init or blocks on plt.show()
+    import matplotlib.pyplot as plt
 
-plt.title('Revenue Growth (%) Over Years')
-plt.xlabel('Fiscal Year')
-plt.ylabel('Revenue Growth (%)')
-plt.legend()
-plt.show()
+    # One pivot-and-plot call draws every company; no per-company Python loop
+    df.pivot(index='Fiscal Year', columns='Company', values='Revenue Growth (%)').plot(figsize=(10, 6))
+    plt.title('Revenue Growth (%) Over Years')
+    plt.xlabel('Fiscal Year')
+    plt.ylabel('Revenue Growth (%)')
+    plt.legend()
+    plt.show()
 
 """Summary of Findings:
 Microsoft:
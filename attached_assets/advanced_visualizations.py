@@ -1,46 +1,55 @@
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
-import matplotlib.pyplot as plt
 from wordcloud import WordCloud
 import io
 import base64
 import numpy as np
+from functools import lru_cache, partial
+
+# Numba is optional; the forecast kernel below runs as plain Python/NumPy
+# when it is not installed
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 def create_financial_ratio_chart(company_data, company):
     """Create financial ratio charts for the selected company"""
     # Calculate common financial ratios
-    company_data = company_data.copy()
-    
     # Current ratio (if we had current assets and current liabilities)
-    # For now we'll use total assets/liabilities
-    company_data['Debt-to-Asset Ratio'] = company_data['Total Liabilities (in millions)'] / company_data['Total Assets (in millions)']
-    
-    # Return on Assets (ROA)
-    company_data['Return on Assets'] = company_data['Net Income (in millions)'] / company_data['Total Assets (in millions)']
-    
-    # Profit Margin
-    company_data['Profit Margin'] = company_data['Net Income (in millions)'] / company_data['Total Revenue (in millions)']
+    # For now we'll use total assets/liabilities. The ratios only exist for
+    # plotting, so keep them as local arrays and feed the traces directly
+    # rather than copying the whole input frame to hold three new columns
+    assets = company_data['Total Assets (in millions)'].to_numpy()
+    liabilities = company_data['Total Liabilities (in millions)'].to_numpy()
+    net_income = company_data['Net Income (in millions)'].to_numpy()
+    revenue = company_data['Total Revenue (in millions)'].to_numpy()
+    years = company_data['Fiscal Year'].to_numpy()
     
     # Create figure with secondary y-axis
     fig = make_subplots(specs=[[{"secondary_y": True}]])
     
     # Add traces
+    # Scattergl renders through WebGL as a single draw call instead of one
+    # SVG DOM node per point
     fig.add_trace(
-        go.Scatter(x=company_data['Fiscal Year'], y=company_data['Debt-to-Asset Ratio'],
+        go.Scattergl(x=years, y=liabilities / assets,
                  mode='lines+markers', name='Debt-to-Asset Ratio'),
         secondary_y=False,
     )
     
     fig.add_trace(
-        go.Scatter(x=company_data['Fiscal Year'], y=company_data['Return on Assets'],
+        go.Scattergl(x=years, y=net_income / assets,
                  mode='lines+markers', name='Return on Assets (ROA)'),
         secondary_y=True,
     )
     
     fig.add_trace(
-        go.Scatter(x=company_data['Fiscal Year'], y=company_data['Profit Margin'],
+        go.Scattergl(x=years, y=net_income / revenue,
                  mode='lines+markers', name='Profit Margin'),
         secondary_y=True,
     )
@@ -57,28 +66,58 @@ def create_financial_ratio_chart(company_data, company):
     
     return fig
 
+# The qualitative palette and the shared horizontal legend layout are the
+# same for every figure; resolve them once at import instead of per call
+_COLORS = tuple(px.colors.qualitative.Plotly)
+
+_LEGEND_LAYOUT = dict(
+    orientation="h",
+    yanchor="bottom",
+    y=1.02,
+    xanchor="right",
+    x=1
+)
+
+# Short metric keys to column names; built once at import instead of on
+# every comparison call
+_METRIC_MAP = {
+    'revenue': 'Total Revenue (in millions)',
+    'net_income': 'Net Income (in millions)',
+    'assets': 'Total Assets (in millions)',
+    'liabilities': 'Total Liabilities (in millions)',
+    'cash_flow': 'Cash Flow from Operating Activities (in millions)'
+}
+
+def _ensure_categorical(df):
+    # Equality and isin against an object-dtype string column compare Python
+    # strings element-wise; category codes make both an integer comparison.
+    # assign instead of in-place so the caller's frame is never mutated
+    if df['Company'].dtype.name != 'category':
+        df = df.assign(Company=df['Company'].astype('category'))
+    return df
+
 def create_performance_comparison(all_data, companies, metric):
     """Create a comparison chart for multiple companies based on a specific metric"""
     # Identify the metric and title
-    metric_map = {
-        'revenue': 'Total Revenue (in millions)',
-        'net_income': 'Net Income (in millions)',
-        'assets': 'Total Assets (in millions)',
-        'liabilities': 'Total Liabilities (in millions)',
-        'cash_flow': 'Cash Flow from Operating Activities (in millions)'
-    }
-    
-    if metric in metric_map:
-        metric_column = metric_map[metric]
-    else:
-        metric_column = 'Total Revenue (in millions)'  # Default
-    
-    # Filter data for selected companies
+    metric_column = _METRIC_MAP.get(metric, 'Total Revenue (in millions)')
+
+    # Filter data for selected companies. Repeat calls are already
+    # memoized content-keyed by the app's cached chart wrapper, so the
+    # isin scan here only runs when a figure actually has to be rebuilt
+    all_data = _ensure_categorical(all_data)
     filtered_data = all_data[all_data['Company'].isin(companies)]
-    
+
+    # Aggregate to one bar per (company, year) before handing the data to
+    # Plotly; render time scales with drawn marks, not input rows, and
+    # observed=True skips categories emptied by the filter
+    plot_df = (filtered_data
+               .groupby(['Company', 'Fiscal Year'], observed=True, sort=False)[metric_column]
+               .sum()
+               .reset_index())
+
     # Create bar chart
     fig = px.bar(
-        filtered_data, 
+        plot_df,
         x='Fiscal Year', 
         y=metric_column,
         color='Company', 
@@ -93,17 +132,42 @@ def create_performance_comparison(all_data, companies, metric):
     # Improve interactivity
     fig.update_layout(
         hovermode="x unified",
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        )
+        legend=_LEGEND_LAYOUT
     )
     
     return fig
 
+def _forecast_kernel(values, total_periods):
+    """Closed-form degree-1 least squares per column of values, evaluated
+    over total_periods steps"""
+    # Written as explicit loops so Numba can compile it when available;
+    # NumPy still executes it correctly (if more slowly) without Numba
+    n, m = values.shape
+    preds = np.empty((total_periods, m), dtype=np.float32)
+    x_mean = (n - 1) / 2.0
+    sxx = 0.0
+    for i in range(n):
+        sxx += (i - x_mean) ** 2
+    for j in range(m):
+        y_mean = 0.0
+        for i in range(n):
+            y_mean += values[i, j]
+        y_mean /= n
+        sxy = 0.0
+        for i in range(n):
+            sxy += (i - x_mean) * (values[i, j] - y_mean)
+        slope = sxy / sxx
+        intercept = y_mean - slope * x_mean
+        for t in range(total_periods):
+            preds[t, j] = intercept + slope * t
+    return preds
+
+if NUMBA_AVAILABLE:
+    _forecast_kernel = numba.njit(cache=True, fastmath=True)(_forecast_kernel)
+    # Warm the compiled specialization at import so the first forecast
+    # render in the app doesn't stall on JIT compilation mid-interaction
+    _forecast_kernel(np.zeros((2, 1), dtype=np.float32), 1)
+
 def create_forecast_chart(company_data, company, periods=2):
     """Create a simple forecast for future periods based on historical trend"""
     # Convert to DataFrame if it's not already
@@ -117,8 +181,10 @@ def create_forecast_chart(company_data, company, periods=2):
     if len(years) < 2:
         return None
     
-    # Create a DataFrame with the forecast
-    forecast_df = company_data.copy()
+    # Create a DataFrame with the forecast; ordering the historical rows
+    # here keeps the whole frame sorted once the ascending future rows are
+    # appended, so the concatenated frame never needs a re-sort
+    forecast_df = company_data.sort_values('Fiscal Year', ignore_index=True)
     
     # Add forecast periods
     last_year = forecast_df['Fiscal Year'].max()
@@ -133,42 +199,31 @@ def create_forecast_chart(company_data, company, periods=2):
         'Cash Flow from Operating Activities (in millions)'
     ]
     
-    # Create new rows for future years
-    for year in future_years:
-        new_row = {'Fiscal Year': year, 'Company': company}
-        forecast_df = pd.concat([forecast_df, pd.DataFrame([new_row])], ignore_index=True)
-    
-    # Sort by year
-    forecast_df = forecast_df.sort_values('Fiscal Year')
-    
-    # For each metric, calculate a simple linear forecast
-    for metric in metrics:
-        # Get actual values
-        y = company_data[metric].values
-        x = np.arange(len(y))
-        
-        # Skip if there are NaNs
-        if np.isnan(y).any():
-            continue
-            
-        # Fit linear regression
-        z = np.polyfit(x, y, 1)
-        p = np.poly1d(z)
-        
-        # Predict for all years (including future)
-        all_years = forecast_df['Fiscal Year'].unique()
-        x_pred = np.arange(len(all_years))
-        
-        # Store predictions
-        predictions = p(x_pred)
-        
-        # Update the forecast DataFrame
-        for i, year in enumerate(all_years):
-            mask = forecast_df['Fiscal Year'] == year
-            
-            # Check if it's a forecast year
-            if year > last_year:
-                forecast_df.loc[mask, metric] = predictions[i]
+    # Create all future-year rows at once; concatenating inside a loop
+    # recopies the whole frame on every iteration
+    future_rows = pd.DataFrame({'Fiscal Year': future_years, 'Company': company})
+    forecast_df = pd.concat([forecast_df, future_rows], ignore_index=True)
+    # Display-only forecasts don't need float64 precision; float32 halves
+    # the memory traffic for the fit and for figure serialization
+    forecast_df[metrics] = forecast_df[metrics].astype(np.float32)
+
+    # The year axis and the future-row mask are the same for every metric,
+    # so compute them once outside the loop
+    all_years = forecast_df['Fiscal Year'].unique()
+    future_sel = all_years > last_year
+    future_mask = forecast_df['Fiscal Year'] > last_year
+
+    # Fit every metric at once through the shared regression kernel, using
+    # the year-ordered historical rows at the head of the forecast frame
+    values = forecast_df[metrics].iloc[:len(company_data)].to_numpy(np.float32)
+    predictions = _forecast_kernel(values, len(all_years))
+
+    # Skip non-finite metrics in one reduction; isfinite also rejects
+    # infinities that would silently poison the fit, which isnan let through
+    finite = np.isfinite(values).all(axis=0)
+    valid_metrics = [m for m, ok in zip(metrics, finite) if ok]
+    if valid_metrics:
+        forecast_df.loc[future_mask, valid_metrics] = predictions[future_sel][:, finite]
     
     # Create traces for actual and forecast data
     fig = make_subplots(specs=[[{"secondary_y": False}]])
@@ -177,81 +232,103 @@ def create_forecast_chart(company_data, company, periods=2):
     actual_data = forecast_df[forecast_df['Fiscal Year'] <= last_year]
     forecast_data = forecast_df[forecast_df['Fiscal Year'] > last_year]
     
-    # Add traces for each metric
-    colors = px.colors.qualitative.Plotly
+    # Build all traces first and hand them to the figure in one call;
+    # add_trace rebuilds internal trace indexing on every invocation
+    traces = []
     
     for i, metric in enumerate(metrics):
-        color = colors[i % len(colors)]
+        color = _COLORS[i % len(_COLORS)]
         
         # Actual data
-        fig.add_trace(
-            go.Scatter(
+        traces.append(
+            go.Scattergl(
                 x=actual_data['Fiscal Year'], 
                 y=actual_data[metric],
                 mode='lines+markers', 
                 name=f"{metric} (Actual)",
+                legendgroup=metric,
                 line=dict(color=color)
             )
         )
         
         # Forecast data (if it has the metric)
         if metric in forecast_data.columns:
-            fig.add_trace(
-                go.Scatter(
+            traces.append(
+                go.Scattergl(
                     x=forecast_data['Fiscal Year'], 
                     y=forecast_data[metric],
                     mode='lines+markers', 
                     name=f"{metric} (Forecast)",
+                    legendgroup=metric,
                     line=dict(color=color, dash='dash')
                 )
             )
     
+    fig.add_traces(traces)
+    
     # Update layout
     fig.update_layout(
         title_text=f"{company} - Financial Metrics Forecast",
         hovermode="x unified",
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        )
+        # Keep zoom/legend state across re-renders so Plotly skips layout work
+        uirevision='forecast',
+        legend=_LEGEND_LAYOUT
     )
     
     return fig
 
+# Columns and display labels for the wordcloud summary, paired by position
+_WORDCLOUD_COLS = [
+    'Total Revenue (in millions)',
+    'Net Income (in millions)',
+    'Total Assets (in millions)',
+    'Total Liabilities (in millions)',
+    'Cash Flow from Operating Activities (in millions)'
+]
+_WORDCLOUD_LABELS = ['Revenue', 'Net Income', 'Assets', 'Liabilities', 'Cash Flow']
+
 def create_financial_wordcloud(financial_data, company):
     """Create a word cloud from financial data"""
     # Extract relevant financial data
     if financial_data is None or not isinstance(financial_data, pd.DataFrame):
         return None
     
+    # Mask on the converted frame so the equality compares category codes;
+    # masking with the original object column would keep the per-element
+    # string compare and waste the conversion
+    financial_data = _ensure_categorical(financial_data)
     company_data = financial_data[financial_data['Company'] == company]
     
     if company_data.empty:
         return None
     
     # Create a text summary of the financial data
-    latest_year_data = company_data.sort_values('Fiscal Year', ascending=False).iloc[0]
-    
-    text_data = f"""
-    {company} Financial Performance
-    Revenue {latest_year_data.get('Total Revenue (in millions)', 0)} million
-    Net Income {latest_year_data.get('Net Income (in millions)', 0)} million
-    Assets {latest_year_data.get('Total Assets (in millions)', 0)} million
-    Liabilities {latest_year_data.get('Total Liabilities (in millions)', 0)} million
-    Cash Flow {latest_year_data.get('Cash Flow from Operating Activities (in millions)', 0)} million
-    """
-    
-    # Add growth metrics
-    growth_metrics = [col for col in latest_year_data.index if 'Growth' in col]
-    for metric in growth_metrics:
-        value = latest_year_data.get(metric, 0)
-        if not pd.isna(value):
-            text_data += f"{metric} {value:.1f}% "
-    
-    # Generate the word cloud
+    # idxmax finds the latest year in one pass; sorting just to take the
+    # first row was O(n log n)
+    latest_year_data = company_data.loc[company_data['Fiscal Year'].idxmax()]
+    
+    # One reindex pulls all five metrics instead of a hash lookup and
+    # scalar format per field; na_value fills missing columns with 0 on the
+    # way out of pandas, which avoids the object-dtype fillna downcasting
+    # FutureWarning the row Series would otherwise raise
+    metric_values = latest_year_data.reindex(_WORDCLOUD_COLS).to_numpy(dtype=float, na_value=0)
+    text_data = f"{company} Financial Performance\n" + "\n".join(
+        f"{label} {value} million"
+        for label, value in zip(_WORDCLOUD_LABELS, metric_values))
+    text_data += "\n"
+    
+    # Add growth metrics; one C-level NaN scan instead of a per-cell
+    # get/isna branch
+    growth_series = latest_year_data.filter(like='Growth').dropna()
+    text_data += ' '.join(f"{metric} {value:.1f}%" for metric, value in growth_series.items())
+    
+    return _render_wordcloud(text_data)
+
+@lru_cache(maxsize=128)
+def _render_wordcloud(text_data):
+    """Render the wordcloud text to a base64 PNG, memoized on the text"""
+    # The text embeds the company name and the rounded metric values, so it
+    # doubles as the cache key; flipping back to a tab reuses the rendered PNG
     wordcloud = WordCloud(
         width=800, 
         height=400, 
@@ -260,24 +337,38 @@ def create_financial_wordcloud(financial_data, company):
         max_words=100
     ).generate(text_data)
     
-    # Convert to image
-    plt.figure(figsize=(10, 5))
-    plt.imshow(wordcloud, interpolation='bilinear')
-    plt.axis("off")
-    plt.tight_layout(pad=0)
-    
-    # Save to a BytesIO object
+    # WordCloud already renders to a PIL image; encoding it directly skips
+    # the matplotlib figure, imshow and savefig round trip entirely
     img_bytes = io.BytesIO()
-    plt.savefig(img_bytes, format='png')
-    img_bytes.seek(0)
+    wordcloud.to_image().save(img_bytes, format='PNG', optimize=True)
     
     # Get the base64 string
-    img_str = base64.b64encode(img_bytes.read()).decode()
-    
-    # Close the figure to free memory
-    plt.close()
-    
-    return img_str
+    return base64.b64encode(img_bytes.getvalue()).decode()
+
+# Registering the hovertemplate as a template applies it to every trace at
+# construction time, replacing the update_traces walk over the built figure;
+# cover the svg, webgl and bar trace types the builders can emit
+_HOVERTEMPLATE = "<b>%{x}</b><br>%{y} million $<br>"
+pio.templates['fin1_hover'] = go.layout.Template(
+    data_scatter=[go.Scatter(hovertemplate=_HOVERTEMPLATE)],
+    data_scattergl=[go.Scattergl(hovertemplate=_HOVERTEMPLATE)],
+    data_bar=[go.Bar(hovertemplate=_HOVERTEMPLATE)]
+)
+
+# Chart builders with their fixed kwargs and title suffixes, resolved once
+# at import; picking one is a dict lookup instead of an if/elif ladder with
+# duplicated fallback branches
+_CHART_BUILDERS = {
+    'line': (partial(px.line, markers=True, render_mode='webgl'),
+             'Financial Metrics Over Time'),
+    'bar': (partial(px.bar, barmode='group'),
+            'Financial Metrics Comparison'),
+    'area': (px.area, 'Financial Metrics Trends'),
+}
+
+# Single fallback shared by unknown chart types and the degenerate
+# single-metric scatter case
+_DEFAULT_CHART = _CHART_BUILDERS['line']
 
 def create_interactive_chart(company_data, chart_type, metrics=None):
     """Create custom interactive charts based on user preference"""
@@ -286,84 +377,35 @@ def create_interactive_chart(company_data, chart_type, metrics=None):
     
     company = company_data['Company'].iloc[0] if not company_data.empty else "Company"
     
-    if chart_type == 'line':
-        fig = px.line(
+    if chart_type == 'scatter' and len(metrics) >= 2:
+        # Scatter needs two metrics and its own axis mapping
+        fig = px.scatter(
             company_data, 
-            x='Fiscal Year', 
-            y=metrics,
-            title=f"{company} - Financial Metrics Over Time",
-            markers=True,
-            labels={"value": "Amount (in millions $)", "variable": "Metric"}
+            x=metrics[0], 
+            y=metrics[1],
+            size='Fiscal Year',
+            color='Fiscal Year',
+            render_mode='webgl',
+            title=f"{company} - {metrics[0]} vs {metrics[1]} Relationship",
+            labels={metrics[0]: f"{metrics[0]} (in millions $)", metrics[1]: f"{metrics[1]} (in millions $)"}
         )
-        
-    elif chart_type == 'bar':
-        fig = px.bar(
-            company_data, 
-            x='Fiscal Year', 
-            y=metrics,
-            title=f"{company} - Financial Metrics Comparison",
-            barmode='group',
-            labels={"value": "Amount (in millions $)", "variable": "Metric"}
-        )
-        
-    elif chart_type == 'area':
-        fig = px.area(
-            company_data, 
-            x='Fiscal Year', 
-            y=metrics,
-            title=f"{company} - Financial Metrics Trends",
-            labels={"value": "Amount (in millions $)", "variable": "Metric"}
-        )
-        
-    elif chart_type == 'scatter':
-        # Only works with 2 metrics
-        if len(metrics) >= 2:
-            fig = px.scatter(
-                company_data, 
-                x=metrics[0], 
-                y=metrics[1],
-                size='Fiscal Year',
-                color='Fiscal Year',
-                title=f"{company} - {metrics[0]} vs {metrics[1]} Relationship",
-                labels={metrics[0]: f"{metrics[0]} (in millions $)", metrics[1]: f"{metrics[1]} (in millions $)"}
-            )
-        else:
-            # Fallback to line chart
-            fig = px.line(
-                company_data, 
-                x='Fiscal Year', 
-                y=metrics,
-                title=f"{company} - Financial Metrics Over Time",
-                markers=True,
-                labels={"value": "Amount (in millions $)", "variable": "Metric"}
-            )
     else:
-        # Default to line chart
-        fig = px.line(
-            company_data, 
-            x='Fiscal Year', 
+        # Unknown chart types and the single-metric scatter fall back to line
+        builder, title_suffix = _CHART_BUILDERS.get(chart_type, _DEFAULT_CHART)
+        fig = builder(
+            company_data,
+            x='Fiscal Year',
             y=metrics,
-            title=f"{company} - Financial Metrics Over Time",
-            markers=True,
+            title=f"{company} - {title_suffix}",
             labels={"value": "Amount (in millions $)", "variable": "Metric"}
         )
     
-    # Add hover data
-    fig.update_traces(
-        hovertemplate="<b>%{x}</b><br>" +
-                      "%{y} million $<br>"
-    )
-    
-    # Improve layout
+    # Improve layout; '+' stacks the hover template on top of the default
+    # plotly styling
     fig.update_layout(
+        template='plotly+fin1_hover',
         hovermode="x unified",
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        )
+        legend=_LEGEND_LAYOUT
     )
     
     return fig
\ No newline at end of file
@@ -1,9 +1,8 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
-from financial_analysis import load_data, analyze_data, generate_response, generate_visualization
+# plotly.express and plotly.graph_objects are imported lazily inside the
+# branches that build charts with them, keeping their cost off app startup
+from financial_analysis import load_data, analyze_data, enrich_financial_data, generate_response, generate_visualization
 from nlp_processor import analyze_query, extract_financial_terms
 from advanced_visualizations import (
     create_financial_ratio_chart,
@@ -13,8 +12,200 @@ from advanced_visualizations import (
     create_interactive_chart
 )
 import base64
+import io
+import json
 from datetime import datetime
 
+# Optional: orjson serializes record payloads several times faster than
+# the pandas JSON writer; the export falls back to to_json without it
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Optional: Arrow's multi-threaded CSV writer outpaces pandas to_csv and
+# keeps the data columnar until the bytes are written
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Cached wrappers so Streamlit's rerun-per-interaction model doesn't redo
+# disk I/O and the full analysis pipeline on every widget event
+def _compact(df):
+    # Category codes turn every Company equality/isin/groupby into an integer
+    # comparison, and int32 years halve that column's bandwidth
+    df['Company'] = df['Company'].astype('category')
+    df['Fiscal Year'] = df['Fiscal Year'].astype('int32')
+    return df
+
+@st.cache_data(show_spinner=False)
+def _cached_load():
+    return _compact(load_data())
+
+@st.cache_data
+def _cached_upload(file_bytes):
+    # Keyed on the raw bytes, so re-parsing only happens when a different
+    # file is uploaded
+    try:
+        # The pyarrow engine parses columns in parallel; it has no thousands-
+        # separator support, so convert numeric columns it left as strings
+        df = pd.read_csv(io.BytesIO(file_bytes), engine='pyarrow')
+        for col in df.columns:
+            if df[col].dtype == object:
+                converted = pd.to_numeric(df[col].str.replace(',', '', regex=False), errors='coerce')
+                # Convert when every non-null entry parsed; requiring *all*
+                # entries to parse would leave a numeric column with any
+                # missing cell stuck as strings
+                if converted.notna().equals(df[col].notna()):
+                    df[col] = converted
+        return _compact(df)
+    except Exception:
+        # pyarrow missing or parse failure: the classic engine understands
+        # thousands separators natively
+        return _compact(pd.read_csv(io.BytesIO(file_bytes), thousands=','))
+
+@st.cache_data
+def _cached_enrich(df):
+    # Growth and ratio columns are derived once per distinct frame; every
+    # tab reads them off df, so the enrichment lives in the cache rather
+    # than as a side effect of building the analysis dict
+    return enrich_financial_data(df)
+
+@st.cache_data
+def _cached_analyze(df):
+    return analyze_data(df)
+
+@st.cache_resource
+def _sample_b64():
+    # The sample file never changes while the app runs; read and encode it
+    # once per process instead of on every rerun of the upload tab
+    with open('sample_financial_data.csv', 'rb') as f:
+        return base64.b64encode(f.read()).decode()
+
+@st.cache_data(show_spinner=False)
+def _export_payload(df, fmt):
+    # The download buttons render on every rerun of the summary tab, so
+    # the serialized bytes are cached per (frame, format); repeat renders
+    # and repeat downloads reuse the same payload
+    if fmt == "CSV":
+        if PYARROW_AVAILABLE:
+            sink = io.BytesIO()
+            pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), sink)
+            return sink.getvalue()
+        return df.to_csv(index=False).encode()
+    if ORJSON_AVAILABLE:
+        # OPT_SERIALIZE_NUMPY lets orjson write numpy scalars directly,
+        # skipping a Python-object conversion pass over every cell
+        return orjson.dumps(df.to_dict(orient="records"),
+                            option=orjson.OPT_SERIALIZE_NUMPY)
+    return df.to_json(orient="records").encode()
+
+@st.cache_data
+def _indexed(df):
+    # Index once, look up many: a sorted (Company, Fiscal Year) MultiIndex
+    # turns the per-company and per-year filters into index lookups instead
+    # of boolean-mask scans; drop=False keeps the flat columns for charts
+    return df.set_index(['Company', 'Fiscal Year'], drop=False).sort_index()
+
+@st.cache_data
+def _metric_columns(columns_key):
+    # The metric pickers rescan every column name on each rerun; the column
+    # set only changes when metrics are recalculated, so derive both lists
+    # once per column tuple
+    available = [col for col in columns_key if '(in millions)' in col or '(%)' in col]
+    growth = [col for col in columns_key if 'Growth' in col]
+    return available, growth
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def _cached_response(query, company, year_span, data_key, _analysis, _company_data):
+    # The suggestion selectbox makes repeat questions the common case; the
+    # bounded cache serves them instantly while free-text one-offs age out
+    response = generate_response(query, _analysis, company)
+    fig = generate_visualization(query, _company_data, company)
+    return response, fig
+
+# Figure construction walks the filtered frame and serializes large traces;
+# cache the expensive charts on a cheap (company, year range, row count) key
+# so tab switches reuse the built figure. The leading underscore stops
+# Streamlit from hashing the frame itself.
+@st.cache_data(show_spinner=False)
+def _cached_ratio_chart(_company_data, company, data_key):
+    return create_financial_ratio_chart(_company_data, company)
+
+@st.cache_data(show_spinner=False)
+def _cached_comparison_chart(_df, companies_key, metric, data_key):
+    return create_performance_comparison(_df, list(companies_key), metric)
+
+@st.cache_data(show_spinner=False)
+def _cached_forecast_chart(_company_data, company, periods, data_key):
+    return create_forecast_chart(_company_data, company, periods)
+
+@st.cache_data(show_spinner=False)
+def _cached_trend_json(company, data_key, _yearly_records):
+    # st.plotly_chart JSON-serializes whatever figure it is handed on
+    # every call; caching the serialized payload itself means repeat
+    # renders skip both the figure build and the serialization, and the
+    # summary tab just json.loads the cached string
+    import plotly.graph_objects as go
+
+    # yearly_data arrives as year-sorted column arrays, so the trace data
+    # is a dict lookup per series — no Python-level sort or row iteration
+    years = _yearly_records['Fiscal Year']
+    revenues = _yearly_records['Total Revenue (in millions)']
+    net_incomes = _yearly_records['Net Income (in millions)']
+
+    try:
+        # Optional: downsamples long series to the points that are
+        # actually visible before the figure is serialized, which keeps
+        # the payload flat as histories grow
+        from plotly_resampler import FigureResampler
+        fig = FigureResampler(go.Figure())
+    except ImportError:
+        fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=years,
+        y=revenues,
+        mode='lines+markers',
+        name='Revenue',
+        line=dict(color='#1E88E5', width=3)
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=years,
+        y=net_incomes,
+        mode='lines+markers',
+        name='Net Income',
+        line=dict(color='#43A047', width=3)
+    ))
+
+    fig.update_layout(
+        title=f"{company} - Key Financial Trends",
+        xaxis_title="Fiscal Year",
+        yaxis_title="Amount (in millions $)",
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        hovermode="x unified"
+    )
+
+    return fig.to_json()
+
+# st.tabs runs every tab body on every rerun, so chart builds in hidden
+# tabs execute while the user types in the chat tab. Wrapping the heavy tab
+# bodies in fragments scopes reruns from widgets inside a tab to that tab
+# alone; on Streamlit versions without fragments the decorator is a no-op
+# and behavior is unchanged.
+_fragment = st.fragment if hasattr(st, 'fragment') else (lambda f: f)
+
 # Set page configuration
 st.set_page_config(
     page_title="Financial Analysis Chatbot",
@@ -26,6 +217,26 @@ st.set_page_config(
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 
+# Cumulative chat HTML; each message is formatted exactly once when it
+# arrives instead of re-formatting the whole history every rerun
+if 'chat_html' not in st.session_state:
+    st.session_state.chat_html = ""
+
+def _chat_block(role, content):
+    if role == "user":
+        return f'''
+            <div class="chat-message user">
+                <div class="avatar user-avatar">👤</div>
+                <div class="content">{content}</div>
+            </div>
+            '''
+    return f'''
+            <div class="chat-message bot">
+                <div class="avatar bot-avatar">🤖</div>
+                <div class="content">{content}</div>
+            </div>
+            '''
+
 if 'company_comparison' not in st.session_state:
     st.session_state.company_comparison = []
 
@@ -118,18 +329,40 @@ sidebar = st.sidebar
 sidebar.title("Settings")
 uploaded_file = sidebar.file_uploader("Upload financial data (CSV)", type="csv")
 
-# Data loading
+# Data loading. The sidebar widget is the single upload point: the file is
+# parsed exactly once and the frame shared through session state, so the
+# Data Upload tab works from the same parse instead of its own uploader
+# (two widgets meant an upload through one was invisible to the other)
 if uploaded_file is not None:
-    # Load data from uploaded file
-    df = pd.read_csv(uploaded_file, thousands=',')
+    st.session_state.uploaded_df = _cached_upload(uploaded_file.getvalue())
+    # Replace keeps the original sidebar behavior (analyze the uploaded
+    # file on its own); Add feeds the Data Upload tab's merge flow
+    upload_mode = sidebar.radio(
+        "Use the uploaded data to:",
+        ("Replace the dataset", "Add to the existing dataset")
+    )
     sidebar.success("Data uploaded successfully!")
 else:
-    # Load the provided sample data
-    df = load_data()
+    st.session_state.pop('uploaded_df', None)
+    upload_mode = None
+
+if upload_mode == "Replace the dataset":
+    df = st.session_state.uploaded_df
+elif 'df' in st.session_state:
+    # A dataset extended in the upload tab persists across reruns in
+    # session state and supersedes the freshly loaded base data, so every
+    # derived view below (filtered frames, indexes, charts) sees the
+    # merged rows on the rerun that follows the upload
+    df = st.session_state.df
+else:
+    # Load the provided sample data as the base dataset
+    df = _cached_load()
     sidebar.info("Using sample financial data for Microsoft, Tesla, and Apple.")
 
-# Process the data
-analysis_data = analyze_data(df)
+# Process the data: derive growth/ratio columns, then the summary dict,
+# each a cache hit on reruns where the frame is unchanged
+df = _cached_enrich(df)
+analysis_data = _cached_analyze(df)
 
 # Company selection
 companies = df['Company'].unique()
@@ -143,8 +376,8 @@ compare_companies = sidebar.multiselect(
 )
 st.session_state.company_comparison = compare_companies
 
-# Filter data for the selected company
-company_data = df[df['Company'] == selected_company]
+# Filter data for the selected company through the sorted index
+company_data = _indexed(df).loc[selected_company]
 
 # Fiscal year range for filtering
 years = sorted(df['Fiscal Year'].unique())
@@ -157,28 +390,17 @@ year_range = sidebar.slider(
 
 # Filter data based on the year range
 filtered_df = df[(df['Fiscal Year'] >= year_range[0]) & (df['Fiscal Year'] <= year_range[1])]
-filtered_company_data = company_data[(company_data['Fiscal Year'] >= year_range[0]) & (company_data['Fiscal Year'] <= year_range[1])]
+# The company slice is indexed by year, so the range filter is a slice
+filtered_company_data = company_data.loc[year_range[0]:year_range[1]]
 
 # TAB 1: CHAT INTERFACE
 with tab1:
     st.header("Financial Analysis Chat")
     
-    # Display chat history
-    for message in st.session_state.chat_history:
-        if message["role"] == "user":
-            st.markdown(f"""
-            <div class="chat-message user">
-                <div class="avatar user-avatar">👤</div>
-                <div class="content">{message["content"]}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-            <div class="chat-message bot">
-                <div class="avatar bot-avatar">🤖</div>
-                <div class="content">{message["content"]}</div>
-            </div>
-            """, unsafe_allow_html=True)
+    # Display chat history: one markdown parse of the cached HTML instead
+    # of one parse per message per rerun
+    if st.session_state.chat_html:
+        st.markdown(st.session_state.chat_html, unsafe_allow_html=True)
     
     # Chat input with autocomplete suggestions
     st.subheader("Ask me about financial performance")
@@ -216,23 +438,22 @@ with tab1:
         if user_query:
             # Add user query to chat history
             st.session_state.chat_history.append({"role": "user", "content": user_query})
+            st.session_state.chat_html += _chat_block("user", user_query)
             
-            # Generate response
-            response = generate_response(user_query, analysis_data, selected_company)
+            # Generate response and visualization; repeated questions for
+            # the same company and year range come straight from the cache
+            response, fig = _cached_response(
+                user_query, selected_company, year_range,
+                (len(df), int(df['Fiscal Year'].max())),
+                analysis_data, filtered_company_data
+            )
             
             # Add response to chat history
             st.session_state.chat_history.append({"role": "assistant", "content": response})
-            
-            # Generate visualization based on the query
-            fig = generate_visualization(user_query, filtered_company_data, selected_company)
+            st.session_state.chat_html += _chat_block("bot", response)
             
             # Display the latest response and visualization
-            st.markdown(f"""
-            <div class="chat-message bot">
-                <div class="avatar bot-avatar">🤖</div>
-                <div class="content">{response}</div>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(_chat_block("bot", response), unsafe_allow_html=True)
             
             if fig:
                 st.plotly_chart(fig, use_container_width=True)
@@ -243,17 +464,19 @@ with tab1:
     # Option to clear chat history
     if st.button("Clear Chat History", key="clear_chat"):
         st.session_state.chat_history = []
+        st.session_state.chat_html = ""
         st.rerun()
 
 # TAB 2: DATA EXPLORER
-with tab2:
+@_fragment
+def _render_data_explorer():
     st.header("Financial Data Explorer")
     
     # Display basic financial information for the selected company
     st.subheader(f"{selected_company} - Financial Overview")
     
-    latest_year = company_data['Fiscal Year'].max()
-    latest_data = company_data[company_data['Fiscal Year'] == latest_year].iloc[0]
+    # The company slice is sorted by year, so its last row is the latest
+    latest_data = company_data.iloc[-1]
     
     # Handle NaN values for growth percentages
     revenue_growth = latest_data.get('Revenue Growth (%)', 0)
@@ -331,7 +554,7 @@ with tab2:
         )
         
         # Metric selection for the chart
-        available_metrics = [col for col in filtered_company_data.columns if '(in millions)' in col or '(%)' in col]
+        available_metrics, _ = _metric_columns(tuple(filtered_company_data.columns))
         selected_metrics = st.multiselect(
             "Select metrics to display:",
             available_metrics,
@@ -346,8 +569,12 @@ with tab2:
         else:
             st.warning("Please select at least one metric to display.")
 
+with tab2:
+    _render_data_explorer()
+
 # TAB 3: ADVANCED ANALYTICS
-with tab3:
+@_fragment
+def _render_advanced_analytics():
     st.header("Advanced Financial Analytics")
     
     # Subtabs for different analysis types
@@ -361,7 +588,8 @@ with tab3:
         st.subheader(f"Financial Ratios Analysis - {selected_company}")
         
         # Ratio chart
-        ratio_chart = create_financial_ratio_chart(filtered_company_data, selected_company)
+        ratio_chart = _cached_ratio_chart(filtered_company_data, selected_company,
+                                          (year_range, len(df)))
         st.plotly_chart(ratio_chart, use_container_width=True)
         
         # Explanation of ratios
@@ -400,10 +628,11 @@ with tab3:
             }
             
             # Create comparison chart
-            comparison_chart = create_performance_comparison(
-                filtered_df, 
-                st.session_state.company_comparison,
-                metric_mapping[comparison_metric]
+            comparison_chart = _cached_comparison_chart(
+                filtered_df,
+                tuple(st.session_state.company_comparison),
+                metric_mapping[comparison_metric],
+                (year_range, len(df))
             )
             
             st.plotly_chart(comparison_chart, use_container_width=True)
@@ -411,33 +640,42 @@ with tab3:
             # Add comparison table
             st.subheader("Comparative Summary (Latest Year)")
             
-            # Get the latest year data for each company
-            latest_data_per_company = []
+            # Get the latest year data for each company: one grouped idxmax
+            # instead of two full-frame scans per selected company
+            selected_rows = filtered_df[filtered_df['Company'].isin(st.session_state.company_comparison)]
             
-            for company in st.session_state.company_comparison:
-                company_df = filtered_df[filtered_df['Company'] == company]
-                if not company_df.empty:
-                    max_year = company_df['Fiscal Year'].max()
-                    latest_row = company_df[company_df['Fiscal Year'] == max_year].iloc[0]
-                    latest_data_per_company.append({
-                        'Company': company,
-                        'Year': max_year,
-                        'Revenue': f"${latest_row['Total Revenue (in millions)']:,}M",
-                        'Net Income': f"${latest_row['Net Income (in millions)']:,}M",
-                        'Profit Margin': f"{latest_row['Profit Margin (%)']:.1f}%",
-                        'ROA': f"{latest_row['ROA (%)']:.1f}%",
-                        'Debt Ratio': f"{latest_row['Debt-to-Asset Ratio']:.2f}"
-                    })
-            
-            if latest_data_per_company:
-                comparison_df = pd.DataFrame(latest_data_per_company)
-                st.dataframe(comparison_df, use_container_width=True, hide_index=True)
+            if not selected_rows.empty:
+                latest = selected_rows.loc[
+                    selected_rows.groupby('Company', sort=False, observed=True)['Fiscal Year'].idxmax()]
+                # Keep the columns numeric and let a single Styler pass apply
+                # the display formats, instead of per-cell Python .format calls
+                comparison_df = latest[[
+                    'Company', 'Fiscal Year', 'Total Revenue (in millions)',
+                    'Net Income (in millions)', 'Profit Margin (%)', 'ROA (%)',
+                    'Debt-to-Asset Ratio'
+                ]].rename(columns={
+                    'Fiscal Year': 'Year',
+                    'Total Revenue (in millions)': 'Revenue',
+                    'Net Income (in millions)': 'Net Income',
+                    'Profit Margin (%)': 'Profit Margin',
+                    'ROA (%)': 'ROA',
+                    'Debt-to-Asset Ratio': 'Debt Ratio'
+                })
+                st.dataframe(
+                    comparison_df.style.format({
+                        'Revenue': '${:,.0f}M',
+                        'Net Income': '${:,.0f}M',
+                        'Profit Margin': '{:.1f}%',
+                        'ROA': '{:.1f}%',
+                        'Debt Ratio': '{:.2f}'
+                    }),
+                    use_container_width=True, hide_index=True)
     
     elif analysis_type == "Growth Analysis":
         st.subheader(f"Growth Analysis - {selected_company}")
         
         # Growth metrics selection
-        growth_metrics = [col for col in filtered_company_data.columns if 'Growth' in col]
+        _, growth_metrics = _metric_columns(tuple(filtered_company_data.columns))
         
         selected_growth_metrics = st.multiselect(
             "Select growth metrics to display:",
@@ -447,6 +685,8 @@ with tab3:
         )
         
         if selected_growth_metrics:
+            import plotly.express as px
+
             # Create growth chart
             fig = px.line(
                 filtered_company_data, 
@@ -484,7 +724,8 @@ with tab3:
         )
         
         # Create forecast chart
-        forecast_chart = create_forecast_chart(filtered_company_data, selected_company, forecast_periods)
+        forecast_chart = _cached_forecast_chart(filtered_company_data, selected_company,
+                                                forecast_periods, (year_range, len(df)))
         
         if forecast_chart:
             st.plotly_chart(forecast_chart, use_container_width=True)
@@ -534,6 +775,9 @@ with tab3:
                 - Cash Flow: ${company_info['cash_flow']:,} million
                 """)
 
+with tab3:
+    _render_advanced_analytics()
+
 # TAB 4: DATA UPLOAD TAB
 with tab4:
     st.header("Upload Financial Data")
@@ -559,21 +803,21 @@ with tab4:
     the application processes and integrates new company data.
     """, icon="ℹ️")
     
-    # Add a download button for the sample file
-    with open('sample_financial_data.csv', 'r') as f:
-        csv_data = f.read()
-    
-    b64 = base64.b64encode(csv_data.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="sample_financial_data.csv">Download Sample Financial Data</a>'
+    # Add a download button for the sample file (encoded once per process)
+    href = f'<a href="data:file/csv;base64,{_sample_b64()}" download="sample_financial_data.csv">Download Sample Financial Data</a>'
     st.markdown(href, unsafe_allow_html=True)
     
-    uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
-    
-    if uploaded_file is not None:
+    # The sidebar uploader already parsed the file; reuse the shared frame
+    uploaded_data = st.session_state.get('uploaded_df')
+
+    if uploaded_data is None:
+        st.info("Upload a CSV file through the sidebar to add its data here.")
+    elif upload_mode == "Replace the dataset":
+        st.info("The uploaded file currently replaces the whole dataset. "
+                "Switch the sidebar option to 'Add to the existing dataset' "
+                "to merge it into the current data instead.")
+    else:
         try:
-            # Read uploaded data
-            uploaded_data = pd.read_csv(uploaded_file)
-            
             # Validate required columns
             required_columns = [
                 'Company', 'Fiscal Year', 'Total Revenue (in millions)', 
@@ -586,66 +830,56 @@ with tab4:
             if missing_columns:
                 st.error(f"Error: The uploaded file is missing the following required columns: {', '.join(missing_columns)}")
             else:
-                # Check if there are any companies that are not in the original dataset
-                new_companies = list(set(uploaded_data['Company']) - set(df['Company']))
-                existing_companies = list(set(uploaded_data['Company']).intersection(set(df['Company'])))
+                # One left join on (Company, Fiscal Year) partitions the
+                # uploaded rows into genuinely new records and overlaps with
+                # existing data, replacing the per-company set-difference loop
+                combo = uploaded_data.merge(
+                    df[['Company', 'Fiscal Year']].drop_duplicates().assign(_exists=True),
+                    on=['Company', 'Fiscal Year'],
+                    how='left'
+                )
+                is_new = combo['_exists'].isna().to_numpy()
+                new_rows = uploaded_data[is_new]
+                overlap_rows = uploaded_data[~is_new]
                 
-                # Create a copy of the global dataframe to modify
-                temp_df = df.copy()
+                existing_company_set = set(df['Company'])
+                new_companies = sorted(set(new_rows['Company']) - existing_company_set)
                 
-                # Add new companies to the dataset (for this session only)
-                if new_companies:
-                    # Filter just the new companies' data
-                    new_company_data = uploaded_data[uploaded_data['Company'].isin(new_companies)]
-                    
-                    # Merge with current dataframe
-                    temp_df = pd.concat([temp_df, new_company_data], ignore_index=True)
-                    
-                    # Update the filtered_df which is used throughout the app
-                    globals()['filtered_df'] = temp_df
-                    
-                    # Update the list of available companies
-                    all_companies = sorted(temp_df['Company'].unique())
-                    
-                    # Automatically select the newly added companies for comparison
-                    for company in new_companies:
-                        if company not in st.session_state.company_comparison:
-                            st.session_state.company_comparison.append(company)
+                # concat already materializes a new frame, so there is no need
+                # to copy df up front; with nothing to add, the existing frame
+                # is used as-is (it is never mutated below)
+                temp_df = df
+
+                # Add the new records to the dataset (for this session only)
+                if not new_rows.empty:
+                    # concat widens Company back to object; restore the
+                    # compact dtypes on the merged frame
+                    temp_df = _compact(pd.concat([df, new_rows], ignore_index=True))
+
+                    # Persist the merged dataset; the next rerun derives
+                    # filtered_df and every other view from it at the top of
+                    # the script instead of patching globals mid-run
+                    st.session_state.df = temp_df
+
+                    if new_companies:
+                        # Automatically select the newly added companies for comparison
+                        for company in new_companies:
+                            if company not in st.session_state.company_comparison:
+                                st.session_state.company_comparison.append(company)
+                        
+                        st.success(f"Successfully added data for new companies: {', '.join(new_companies)}")
                     
-                    st.success(f"Successfully added data for new companies: {', '.join(new_companies)}")
+                    # Report new fiscal years for companies already tracked
+                    added_years = new_rows[new_rows['Company'].isin(existing_company_set)]
+                    for company, years_added in added_years.groupby('Company', sort=False)['Fiscal Year']:
+                        st.info(f"Added new fiscal years {', '.join(map(str, sorted(years_added)))} for {company}")
                 
-                # Update existing company data if present
-                if existing_companies:
-                    # For each existing company, check if there are new fiscal years to add
-                    for company in existing_companies:
-                        existing_data = temp_df[temp_df['Company'] == company]
-                        uploaded_company_data = uploaded_data[uploaded_data['Company'] == company]
-                        
-                        # Get years that are in the uploaded data but not in existing data
-                        existing_years = set(existing_data['Fiscal Year'])
-                        uploaded_years = set(uploaded_company_data['Fiscal Year'])
-                        new_years = uploaded_years - existing_years
-                        
-                        if new_years:
-                            # Add records for new years
-                            new_year_data = uploaded_company_data[uploaded_company_data['Fiscal Year'].isin(new_years)]
-                            temp_df = pd.concat([temp_df, new_year_data], ignore_index=True)
-                            
-                            # Update the filtered_df
-                            globals()['filtered_df'] = temp_df
-                            
-                            st.info(f"Added new fiscal years {', '.join(map(str, new_years))} for {company}")
-                        
-                        # Check for updates to existing years
-                        common_years = uploaded_years.intersection(existing_years)
-                        if common_years:
-                            st.warning(f"The uploaded file contains data for existing years {', '.join(map(str, common_years))} for {company}. Existing data was not overwritten.")
+                # Warn about overlapping years that were not overwritten
+                for company, common_years in overlap_rows.groupby('Company', sort=False)['Fiscal Year']:
+                    st.warning(f"The uploaded file contains data for existing years {', '.join(map(str, sorted(common_years)))} for {company}. Existing data was not overwritten.")
                 
                 # If no new companies or years were added
-                if not new_companies and not any(uploaded_years - existing_years for company in existing_companies 
-                                              for existing_years, uploaded_years in [(set(temp_df[temp_df['Company'] == company]['Fiscal Year']), 
-                                                                                  set(uploaded_data[uploaded_data['Company'] == company]['Fiscal Year']))]
-                                              if company in existing_companies):
+                if new_rows.empty:
                     st.info("The uploaded data already exists in the dataset. No new data was added.")
                 
                 # Display preview of the updated dataset
@@ -654,36 +888,33 @@ with tab4:
                 
                 # Offer to recalculate metrics with the new data
                 if st.button("Recalculate Financial Metrics"):
-                    # Update the global dataframe to include the new data
-                    globals()['df'] = temp_df
-                    
-                    # Recalculate all metrics
-                    # Add growth percentages
-                    for company in df['Company'].unique():
-                        company_data = df[df['Company'] == company].sort_values('Fiscal Year')
-                        
-                        if len(company_data) > 1:
-                            # Calculate growth rates for each metric
-                            for metric in ['Total Revenue (in millions)', 'Net Income (in millions)', 'Cash Flow from Operating Activities (in millions)']:
-                                col_name = f"{metric.split('(')[0].strip()} Growth (%)"
-                                df.loc[df['Company'] == company, col_name] = df[df['Company'] == company][metric].pct_change() * 100
-                            
-                            # Calculate financial ratios
-                            df.loc[df['Company'] == company, 'Profit Margin (%)'] = (df[df['Company'] == company]['Net Income (in millions)'] / df[df['Company'] == company]['Total Revenue (in millions)']) * 100
-                            df.loc[df['Company'] == company, 'ROA (%)'] = (df[df['Company'] == company]['Net Income (in millions)'] / df[df['Company'] == company]['Total Assets (in millions)']) * 100
-                            df.loc[df['Company'] == company, 'Debt-to-Asset Ratio'] = df[df['Company'] == company]['Total Liabilities (in millions)'] / df[df['Company'] == company]['Total Assets (in millions)']
-                    
-                    # Update the filtered dataframe with the recalculated metrics
-                    globals()['filtered_df'] = df
-                    
-                    # Rerun the app to reflect the changes
+                    # Order the merged data so the grouped growth rates line
+                    # up chronologically
+                    merged = temp_df.sort_values(['Company', 'Fiscal Year'], kind='stable', ignore_index=True)
+
+                    # Recalculate all metrics in one grouped pass instead of
+                    # re-masking the whole frame per company and per metric
+                    grouped = merged.groupby('Company', sort=False)
+                    for metric in ['Total Revenue (in millions)', 'Net Income (in millions)', 'Cash Flow from Operating Activities (in millions)']:
+                        col_name = f"{metric.split('(')[0].strip()} Growth (%)"
+                        merged[col_name] = grouped[metric].pct_change() * 100
+
+                    # Financial ratios are whole-column arithmetic
+                    merged['Profit Margin (%)'] = (merged['Net Income (in millions)'] / merged['Total Revenue (in millions)']) * 100
+                    merged['ROA (%)'] = (merged['Net Income (in millions)'] / merged['Total Assets (in millions)']) * 100
+                    merged['Debt-to-Asset Ratio'] = merged['Total Liabilities (in millions)'] / merged['Total Assets (in millions)']
+
+                    # Persist and rerun so the whole app picks up the
+                    # recalculated dataset from session state
+                    st.session_state.df = merged
                     st.rerun()
         
         except Exception as e:
             st.error(f"Error processing the uploaded file: {str(e)}")
 
 # TAB 5: SUMMARY TAB
-with tab5:
+@_fragment
+def _render_summary():
     st.header("Financial Summary Report")
     
     # Generate a comprehensive financial summary
@@ -718,51 +949,22 @@ with tab5:
         Return on Assets: {company_info['roa']:.1f}%
         """)
         
-        # Key trends
+        # Key trends: the figure is built and serialized once per
+        # (company, dataset) in the cached helper; the rerun cost here is
+        # a cache lookup plus json.loads
         if 'yearly_data' in company_info:
             yearly_records = company_info['yearly_data']
-            if len(yearly_records) > 1:
-                # Sort by year
-                yearly_records = sorted(yearly_records, key=lambda x: x['Fiscal Year'])
-                
-                # Create a simple trend visualization
-                years = [record['Fiscal Year'] for record in yearly_records]
-                revenues = [record['Total Revenue (in millions)'] for record in yearly_records]
-                net_incomes = [record['Net Income (in millions)'] for record in yearly_records]
-                
-                fig = go.Figure()
-                
-                fig.add_trace(go.Scatter(
-                    x=years,
-                    y=revenues,
-                    mode='lines+markers',
-                    name='Revenue',
-                    line=dict(color='#1E88E5', width=3)
-                ))
-                
-                fig.add_trace(go.Scatter(
-                    x=years,
-                    y=net_incomes,
-                    mode='lines+markers',
-                    name='Net Income',
-                    line=dict(color='#43A047', width=3)
-                ))
-                
-                fig.update_layout(
-                    title=f"{selected_company} - Key Financial Trends",
-                    xaxis_title="Fiscal Year",
-                    yaxis_title="Amount (in millions $)",
-                    legend=dict(
-                        orientation="h",
-                        yanchor="bottom",
-                        y=1.02,
-                        xanchor="right",
-                        x=1
-                    ),
-                    hovermode="x unified"
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
+            if len(yearly_records['Fiscal Year']) > 1:
+                # Collapsed by default so the initial summary render skips
+                # shipping the chart to the browser; opening it serves the
+                # cached JSON
+                with st.expander("Key Trends"):
+                    trend_json = _cached_trend_json(
+                        selected_company,
+                        (len(df), int(df['Fiscal Year'].max())),
+                        yearly_records
+                    )
+                    st.plotly_chart(json.loads(trend_json), use_container_width=True)
     
     # Export options
     st.subheader("Export Options")
@@ -773,24 +975,33 @@ with tab5:
         horizontal=True
     )
     
-    if st.button("Export Data"):
-        company_filtered_data = filtered_df[filtered_df['Company'] == selected_company]
-        
-        if export_format == "CSV":
-            csv_data = company_filtered_data.to_csv(index=False)
-            b64 = base64.b64encode(csv_data.encode()).decode()
-            href = f'<a href="data:file/csv;base64,{b64}" download="{selected_company}_financial_data.csv">Download CSV file</a>'
-            st.markdown(href, unsafe_allow_html=True)
-            
-        elif export_format == "Excel":
-            # For Excel, we'd normally create a file, but here we'll just provide info
-            st.info("Excel export would be available in a production environment.")
-            
-        elif export_format == "JSON":
-            json_data = company_filtered_data.to_json(orient="records")
-            b64 = base64.b64encode(json_data.encode()).decode()
-            href = f'<a href="data:file/json;base64,{b64}" download="{selected_company}_financial_data.json">Download JSON file</a>'
-            st.markdown(href, unsafe_allow_html=True)
+    # st.download_button sends the bytes straight to the browser; the old
+    # base64 data-URI links materialized the payload three times (text,
+    # bytes, base64 text) and inlined all of it into the page HTML
+    company_filtered_data = filtered_df[filtered_df['Company'] == selected_company]
+
+    if export_format == "CSV":
+        st.download_button(
+            "Download CSV file",
+            data=_export_payload(company_filtered_data, "CSV"),
+            file_name=f"{selected_company}_financial_data.csv",
+            mime="text/csv"
+        )
+
+    elif export_format == "Excel":
+        # For Excel, we'd normally create a file, but here we'll just provide info
+        st.info("Excel export would be available in a production environment.")
+
+    elif export_format == "JSON":
+        st.download_button(
+            "Download JSON file",
+            data=_export_payload(company_filtered_data, "JSON"),
+            file_name=f"{selected_company}_financial_data.json",
+            mime="application/json"
+        )
+
+with tab5:
+    _render_summary()
 
 # Footer with timestamp
 timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -1,8 +1,17 @@
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import re
 import numpy as np
 
+# Optional: polars fuses the whole enrichment into one lazy query plan;
+# the pandas path below remains the fallback when it isn't installed
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
 # Import new NLP and visualization modules
 from nlp_processor import analyze_query
 from advanced_visualizations import (
@@ -17,7 +26,23 @@ def load_data():
     """Load the sample financial data"""
     try:
         # Try to load the file from the attached_assets folder
-        df = pd.read_csv('./attached_assets/Financial_data.csv', thousands=',')
+        try:
+            # The pyarrow engine parses columns in parallel; it has no
+            # thousands-separator support, so convert the numeric columns
+            # it left as strings
+            df = pd.read_csv('./attached_assets/Financial_data.csv', engine='pyarrow')
+            for col in df.columns:
+                if df[col].dtype == object:
+                    converted = pd.to_numeric(df[col].str.replace(',', '', regex=False), errors='coerce')
+                    # Convert when every non-null entry parsed; requiring
+                    # *all* entries to parse would leave a numeric column
+                    # with any missing cell stuck as strings
+                    if converted.notna().equals(df[col].notna()):
+                        df[col] = converted
+        except (ImportError, ValueError):
+            # pyarrow missing or parse failure: the classic engine
+            # understands thousands separators natively
+            df = pd.read_csv('./attached_assets/Financial_data.csv', thousands=',')
     except FileNotFoundError:
         # If file not found, create a DataFrame with the provided sample data
         data = {
@@ -33,92 +58,139 @@ def load_data():
     
     return df
 
-def analyze_data(df):
-    """Process and analyze the financial data"""
-    # Calculate growth rates
-    df['Revenue Growth (%)'] = df.groupby(['Company'])['Total Revenue (in millions)'].pct_change() * 100
-    df['Net Income Growth (%)'] = df.groupby(['Company'])['Net Income (in millions)'].pct_change() * 100
-    df['Asset Growth (%)'] = df.groupby(['Company'])['Total Assets (in millions)'].pct_change() * 100
-    df['Liability Growth (%)'] = df.groupby(['Company'])['Total Liabilities (in millions)'].pct_change() * 100
-    df['Cash Flow Growth (%)'] = df.groupby(['Company'])['Cash Flow from Operating Activities (in millions)'].pct_change() * 100
-    
+def _enrich_polars(df):
+    # All eight derived columns go into one lazy with_columns, so polars
+    # plans and executes them as a single fused pass over the data instead
+    # of five separate grouped pct_change passes plus three ratio scans
+    growth = [
+        ('Total Revenue (in millions)', 'Revenue Growth (%)'),
+        ('Net Income (in millions)', 'Net Income Growth (%)'),
+        ('Total Assets (in millions)', 'Asset Growth (%)'),
+        ('Total Liabilities (in millions)', 'Liability Growth (%)'),
+        ('Cash Flow from Operating Activities (in millions)', 'Cash Flow Growth (%)'),
+    ]
+    lf = pl.from_pandas(df).lazy().with_columns(
+        [(pl.col(src).pct_change().over('Company') * 100).alias(dst)
+         for src, dst in growth]
+        + [
+            (pl.col('Net Income (in millions)') / pl.col('Total Assets (in millions)') * 100).alias('ROA (%)'),
+            (pl.col('Net Income (in millions)') / pl.col('Total Revenue (in millions)') * 100).alias('Profit Margin (%)'),
+            (pl.col('Total Liabilities (in millions)') / pl.col('Total Assets (in millions)')).alias('Debt-to-Asset Ratio'),
+        ]
+    )
+    return lf.collect().to_pandas()
+
+def enrich_financial_data(df):
+    """Return a copy of the data with growth and ratio columns added.
+
+    Kept separate from analyze_data so callers can cache the enriched
+    frame itself (the columns the app's explorers read) independently of
+    the per-company summary dict.
+    """
+    if POLARS_AVAILABLE:
+        try:
+            return _enrich_polars(df)
+        except Exception:
+            # Interop hiccups (e.g. missing pyarrow) fall back to pandas
+            pass
+
+    df = df.copy()
+
+    # Calculate all five growth rates with one grouped pct_change: a
+    # single group partition and one pass over the data instead of five
+    # separate groupby plans
+    # observed=True: Company may be categorical, and unobserved categories
+    # would only add empty groups (and a FutureWarning about the default)
+    df[list(_GROWTH_COLS)] = df.groupby('Company', sort=False, observed=True)[list(_METRIC_MAP.values())].pct_change() * 100
+
     # Calculate additional financial metrics
     # ROA - Return on Assets
     df['ROA (%)'] = (df['Net Income (in millions)'] / df['Total Assets (in millions)']) * 100
-    
+
     # Profit Margin
     df['Profit Margin (%)'] = (df['Net Income (in millions)'] / df['Total Revenue (in millions)']) * 100
-    
+
     # Debt-to-Asset Ratio
     df['Debt-to-Asset Ratio'] = df['Total Liabilities (in millions)'] / df['Total Assets (in millions)']
-    
-    # Group by Company and calculate summary statistics
+
+    return df
+
+def analyze_data(df):
+    """Process and analyze the financial data"""
+    # Add the derived columns unless the caller already enriched the frame
+    if 'Revenue Growth (%)' not in df.columns:
+        df = enrich_financial_data(df)
+
+    # Summary statistics for every company in one sorted pass: after the
+    # sort, each company's last row is its latest year and a grouped
+    # shift(1) lines the previous year's values up underneath it, so all
+    # the changes reduce to aligned column arithmetic instead of two
+    # boolean-mask scans per company
+    ordered = df.sort_values(['Company', 'Fiscal Year'], kind='stable')
+    grouped = ordered.groupby('Company', sort=False, observed=True)
+
+    prev = grouped[['Fiscal Year',
+                    'Total Revenue (in millions)',
+                    'Net Income (in millions)',
+                    'Cash Flow from Operating Activities (in millions)',
+                    'ROA (%)', 'Profit Margin (%)', 'Debt-to-Asset Ratio']].shift(1)
+    latest = grouped.tail(1)
+    prev = prev.loc[latest.index]
+
+    # Changes for all companies at once; rows whose prior sorted year is
+    # not latest_year - 1 keep the original "no previous data" behavior
+    has_prev = prev['Fiscal Year'].to_numpy() == latest['Fiscal Year'].to_numpy() - 1
+
+    revenue_change = latest['Total Revenue (in millions)'].to_numpy() - prev['Total Revenue (in millions)'].to_numpy()
+    revenue_pct = revenue_change / prev['Total Revenue (in millions)'].to_numpy() * 100
+
+    net_income_change = latest['Net Income (in millions)'].to_numpy() - prev['Net Income (in millions)'].to_numpy()
+    net_income_pct = net_income_change / prev['Net Income (in millions)'].to_numpy() * 100
+
+    cash_flow_change = latest['Cash Flow from Operating Activities (in millions)'].to_numpy() - prev['Cash Flow from Operating Activities (in millions)'].to_numpy()
+    cash_flow_pct = cash_flow_change / prev['Cash Flow from Operating Activities (in millions)'].to_numpy() * 100
+
+    roa_change = latest['ROA (%)'].to_numpy() - prev['ROA (%)'].to_numpy()
+    profit_margin_change = latest['Profit Margin (%)'].to_numpy() - prev['Profit Margin (%)'].to_numpy()
+    debt_ratio_change = latest['Debt-to-Asset Ratio'].to_numpy() - prev['Debt-to-Asset Ratio'].to_numpy()
+
+    # Struct-of-arrays: one numpy array per column per company instead of
+    # a Python dict per row. The arrays come out year-sorted (the frame
+    # was sorted above) and feed chart traces directly, with no per-row
+    # boxing here and no re-iteration in the consumers
+    yearly_data = {company: {col: company_data[col].to_numpy()
+                             for col in company_data.columns}
+                   for company, company_data in grouped}
+
     analysis_data = {}
-    
-    for company in df['Company'].unique():
-        company_data = df[df['Company'] == company]
-        
-        # Latest year data
-        latest_year = company_data['Fiscal Year'].max()
-        latest_data = company_data[company_data['Fiscal Year'] == latest_year].iloc[0]
-        
-        # Previous year data
-        previous_year = latest_year - 1
-        previous_data = company_data[company_data['Fiscal Year'] == previous_year]
-        
-        if not previous_data.empty:
-            previous_data = previous_data.iloc[0]
-            
-            # Calculate changes
-            revenue_change = latest_data['Total Revenue (in millions)'] - previous_data['Total Revenue (in millions)']
-            revenue_pct = (revenue_change / previous_data['Total Revenue (in millions)']) * 100
-            
-            net_income_change = latest_data['Net Income (in millions)'] - previous_data['Net Income (in millions)']
-            net_income_pct = (net_income_change / previous_data['Net Income (in millions)']) * 100
-            
-            cash_flow_change = latest_data['Cash Flow from Operating Activities (in millions)'] - previous_data['Cash Flow from Operating Activities (in millions)']
-            cash_flow_pct = (cash_flow_change / previous_data['Cash Flow from Operating Activities (in millions)']) * 100
-            
-            roa_change = latest_data['ROA (%)'] - previous_data['ROA (%)']
-            profit_margin_change = latest_data['Profit Margin (%)'] - previous_data['Profit Margin (%)']
-            debt_ratio_change = latest_data['Debt-to-Asset Ratio'] - previous_data['Debt-to-Asset Ratio']
-        
-            analysis_data[company] = {
-                'latest_year': latest_year,
-                'total_revenue': latest_data['Total Revenue (in millions)'],
-                'net_income': latest_data['Net Income (in millions)'],
-                'total_assets': latest_data['Total Assets (in millions)'],
-                'total_liabilities': latest_data['Total Liabilities (in millions)'],
-                'cash_flow': latest_data['Cash Flow from Operating Activities (in millions)'],
-                'revenue_change': revenue_change,
-                'revenue_pct': revenue_pct,
-                'net_income_change': net_income_change,
-                'net_income_pct': net_income_pct,
-                'cash_flow_change': cash_flow_change,
-                'cash_flow_pct': cash_flow_pct,
-                'roa': latest_data['ROA (%)'],
-                'roa_change': roa_change,
-                'profit_margin': latest_data['Profit Margin (%)'],
-                'profit_margin_change': profit_margin_change,
-                'debt_ratio': latest_data['Debt-to-Asset Ratio'],
-                'debt_ratio_change': debt_ratio_change,
-                'yearly_data': company_data.to_dict('records')
-            }
-        else:
-            # If no previous year data, just include the latest year's data
-            analysis_data[company] = {
-                'latest_year': latest_year,
-                'total_revenue': latest_data['Total Revenue (in millions)'],
-                'net_income': latest_data['Net Income (in millions)'],
-                'total_assets': latest_data['Total Assets (in millions)'],
-                'total_liabilities': latest_data['Total Liabilities (in millions)'],
-                'cash_flow': latest_data['Cash Flow from Operating Activities (in millions)'],
-                'roa': latest_data['ROA (%)'],
-                'profit_margin': latest_data['Profit Margin (%)'],
-                'debt_ratio': latest_data['Debt-to-Asset Ratio'],
-                'yearly_data': company_data.to_dict('records')
-            }
-    
+    for i, row in enumerate(latest.to_dict('records')):
+        company = row['Company']
+        company_info = {
+            'latest_year': row['Fiscal Year'],
+            'total_revenue': row['Total Revenue (in millions)'],
+            'net_income': row['Net Income (in millions)'],
+            'total_assets': row['Total Assets (in millions)'],
+            'total_liabilities': row['Total Liabilities (in millions)'],
+            'cash_flow': row['Cash Flow from Operating Activities (in millions)'],
+            'roa': row['ROA (%)'],
+            'profit_margin': row['Profit Margin (%)'],
+            'debt_ratio': row['Debt-to-Asset Ratio'],
+            'yearly_data': yearly_data[company]
+        }
+        if has_prev[i]:
+            company_info.update(
+                revenue_change=revenue_change[i],
+                revenue_pct=revenue_pct[i],
+                net_income_change=net_income_change[i],
+                net_income_pct=net_income_pct[i],
+                cash_flow_change=cash_flow_change[i],
+                cash_flow_pct=cash_flow_pct[i],
+                roa_change=roa_change[i],
+                profit_margin_change=profit_margin_change[i],
+                debt_ratio_change=debt_ratio_change[i]
+            )
+        analysis_data[company] = company_info
+
     return analysis_data
 
 def generate_response(query, analysis_data, company):
@@ -254,139 +326,141 @@ def generate_response(query, analysis_data, company):
                 f"• Total Liabilities: ${company_data['total_liabilities']:,} million\n"
                 f"• Cash Flow from Operations: ${company_data['cash_flow']:,} million")
 
+# Column names the visualization handlers read, resolved once at import
+# instead of rebuilt per call
+_METRIC_MAP = {
+    'revenue': 'Total Revenue (in millions)',
+    'net_income': 'Net Income (in millions)',
+    'assets': 'Total Assets (in millions)',
+    'liabilities': 'Total Liabilities (in millions)',
+    'cash_flow': 'Cash Flow from Operating Activities (in millions)'
+}
+
+# Order-aligned with _METRIC_MAP's values; enrich_financial_data assigns
+# the fused pct_change result across both in one shot
+_GROWTH_COLS = ('Revenue Growth (%)', 'Net Income Growth (%)', 'Asset Growth (%)',
+                'Liability Growth (%)', 'Cash Flow Growth (%)')
+
+def _viz_revenue(company_data, company, query_lower):
+    if 'growth' in query_lower:
+        return px.line(company_data, x="Fiscal Year",
+                       y="Revenue Growth (%)",
+                       title=f"{company} - Revenue Growth Over Time",
+                       markers=True,
+                       labels={"Revenue Growth (%)": "Growth (%)"})
+    return px.bar(company_data, x="Fiscal Year",
+                  y="Total Revenue (in millions)",
+                  title=f"{company} - Revenue",
+                  labels={"Total Revenue (in millions)": "Revenue (in millions $)"})
+
+def _viz_net_income(company_data, company, query_lower):
+    if 'growth' in query_lower:
+        return px.line(company_data, x="Fiscal Year",
+                       y="Net Income Growth (%)",
+                       title=f"{company} - Net Income Growth Over Time",
+                       markers=True,
+                       labels={"Net Income Growth (%)": "Growth (%)"})
+    return px.bar(company_data, x="Fiscal Year",
+                  y="Net Income (in millions)",
+                  title=f"{company} - Net Income",
+                  labels={"Net Income (in millions)": "Net Income (in millions $)"})
+
+def _viz_assets_liabilities(company_data, company, query_lower):
+    return px.bar(company_data, x="Fiscal Year",
+                  y=["Total Assets (in millions)", "Total Liabilities (in millions)"],
+                  title=f"{company} - Assets and Liabilities",
+                  barmode="group",
+                  labels={"value": "Amount (in millions $)", "variable": "Metric"})
+
+def _viz_cash_flow(company_data, company, query_lower):
+    if 'growth' in query_lower:
+        return px.line(company_data, x="Fiscal Year",
+                       y="Cash Flow Growth (%)",
+                       title=f"{company} - Cash Flow Growth Over Time",
+                       markers=True,
+                       labels={"Cash Flow Growth (%)": "Growth (%)"})
+    return px.line(company_data, x="Fiscal Year",
+                   y="Cash Flow from Operating Activities (in millions)",
+                   title=f"{company} - Cash Flow from Operating Activities",
+                   markers=True,
+                   labels={"Cash Flow from Operating Activities (in millions)": "Cash Flow (in millions $)"})
+
+def _viz_growth(company_data, company, query_lower):
+    growth_metrics = [col for col in _GROWTH_COLS if col in company_data.columns]
+    return px.line(company_data, x="Fiscal Year",
+                   y=growth_metrics,
+                   title=f"{company} - Financial Growth Metrics",
+                   markers=True,
+                   labels={"value": "Growth (%)", "variable": "Metric"})
+
+def _viz_performance(company_data, company, query_lower):
+    return create_financial_ratio_chart(company_data, company)
+
+# Base layout for the overview figure, built once at import. The overview
+# is the default answer for unmatched queries, so it skips plotly
+# express' dataframe melt-and-convert step entirely: per call it only
+# attaches raw arrays as traces and sets the title.
+_OVERVIEW_COLS = ('Total Revenue (in millions)', 'Net Income (in millions)',
+                  'Cash Flow from Operating Activities (in millions)')
+
+_OVERVIEW_LAYOUT = go.Layout(
+    xaxis=dict(title='Fiscal Year'),
+    yaxis=dict(title='Amount (in millions $)'),
+    legend=dict(title=dict(text='Metric'))
+)
+
+def _viz_overview(company_data, company, title):
+    years = company_data['Fiscal Year'].to_numpy()
+    fig = go.Figure(layout=_OVERVIEW_LAYOUT)
+    fig.add_traces([
+        go.Scatter(x=years, y=company_data[col].to_numpy(),
+                   mode='lines+markers', name=col)
+        for col in _OVERVIEW_COLS
+    ])
+    fig.update_layout(title=title)
+    return fig
+
+# Dict dispatch on the NLP query type instead of a long elif ladder
+_VIZ_DISPATCH = {
+    'revenue_query': _viz_revenue,
+    'net_income_query': _viz_net_income,
+    'assets_liabilities_query': _viz_assets_liabilities,
+    'cash_flow_query': _viz_cash_flow,
+    'growth_query': _viz_growth,
+    'performance_query': _viz_performance
+}
+
 def generate_visualization(query, company_data, company):
     """Generate an appropriate visualization based on the query using NLP analysis"""
     # Use the NLP processor to analyze the query
     query_analysis = analyze_query(query, company)
-    
+
     # Extract query information
     query_type = query_analysis.get('query_type')
     is_comparison = query_analysis.get('is_comparison', False)
-    is_trend = query_analysis.get('is_trend', False)
     is_forecast = query_analysis.get('is_forecast', False)
     metrics = query_analysis.get('metrics', ['all'])
-    
-    # Map metrics to column names
-    metric_map = {
-        'revenue': 'Total Revenue (in millions)',
-        'net_income': 'Net Income (in millions)',
-        'assets': 'Total Assets (in millions)',
-        'liabilities': 'Total Liabilities (in millions)',
-        'cash_flow': 'Cash Flow from Operating Activities (in millions)',
-        'all': None  # Special case handled separately
-    }
-    
-    # Revenue visualization
-    if query_type == 'revenue_query':
-        if 'growth' in query.lower():
-            title = f"{company} - Revenue Growth Over Time"
-            fig = px.line(company_data, x="Fiscal Year", 
-                          y="Revenue Growth (%)", 
-                          title=title,
-                          markers=True,
-                          labels={"Revenue Growth (%)": "Growth (%)"})
-            return fig
-        else:
-            title = f"{company} - Revenue"
-            fig = px.bar(company_data, x="Fiscal Year", 
-                         y="Total Revenue (in millions)",
-                         title=title,
-                         labels={"Total Revenue (in millions)": "Revenue (in millions $)"})
-            return fig
-    
-    # Net income visualization
-    elif query_type == 'net_income_query':
-        if 'growth' in query.lower():
-            title = f"{company} - Net Income Growth Over Time"
-            fig = px.line(company_data, x="Fiscal Year", 
-                          y="Net Income Growth (%)", 
-                          title=title,
-                          markers=True,
-                          labels={"Net Income Growth (%)": "Growth (%)"})
-            return fig
-        else:
-            title = f"{company} - Net Income"
-            fig = px.bar(company_data, x="Fiscal Year", 
-                         y="Net Income (in millions)",
-                         title=title,
-                         labels={"Net Income (in millions)": "Net Income (in millions $)"})
-            return fig
-    
-    # Assets and liabilities visualization
-    elif query_type == 'assets_liabilities_query':
-        title = f"{company} - Assets and Liabilities"
-        fig = px.bar(company_data, x="Fiscal Year", 
-                     y=["Total Assets (in millions)", "Total Liabilities (in millions)"],
-                     title=title,
-                     barmode="group",
-                     labels={"value": "Amount (in millions $)", "variable": "Metric"})
-        return fig
-    
-    # Cash flow visualization
-    elif query_type == 'cash_flow_query':
-        if 'growth' in query.lower():
-            title = f"{company} - Cash Flow Growth Over Time"
-            fig = px.line(company_data, x="Fiscal Year", 
-                          y="Cash Flow Growth (%)", 
-                          title=title,
-                          markers=True,
-                          labels={"Cash Flow Growth (%)": "Growth (%)"})
-            return fig
-        else:
-            title = f"{company} - Cash Flow from Operating Activities"
-            fig = px.line(company_data, x="Fiscal Year", 
-                          y="Cash Flow from Operating Activities (in millions)",
-                          title=title,
-                          markers=True,
-                          labels={"Cash Flow from Operating Activities (in millions)": "Cash Flow (in millions $)"})
-            return fig
-    
-    # Growth visualization - comprehensive growth chart
-    elif query_type == 'growth_query':
-        title = f"{company} - Financial Growth Metrics"
-        growth_metrics = [col for col in company_data.columns if 'Growth' in col]
-        fig = px.line(company_data, x="Fiscal Year", 
-                      y=growth_metrics,
-                      title=title,
-                      markers=True,
-                      labels={"value": "Growth (%)", "variable": "Metric"})
-        return fig
-    
-    # Performance overview - use financial ratio chart
-    elif query_type == 'performance_query':
-        return create_financial_ratio_chart(company_data, company)
-    
-    # Comparison chart (if available)
-    elif is_comparison:
-        # This would need access to all data to compare companies
-        # For now, we'll just display the current company with a note
-        title = f"{company} - Financial Overview (Comparison not available)"
-        fig = px.line(company_data, x="Fiscal Year", 
-                      y=["Total Revenue (in millions)", "Net Income (in millions)", 
-                         "Cash Flow from Operating Activities (in millions)"],
-                      title=title,
-                      markers=True,
-                      labels={"value": "Amount (in millions $)", "variable": "Metric"})
-        return fig
-    
+
+    handler = _VIZ_DISPATCH.get(query_type)
+    if handler is not None:
+        # Lowercase once; the handlers only need it for the growth variants
+        return handler(company_data, company, query.lower())
+
+    # Comparison chart (if available): this would need access to all data
+    # to compare companies, so just display the current company with a note
+    if is_comparison:
+        return _viz_overview(company_data, company,
+                             f"{company} - Financial Overview (Comparison not available)")
+
     # Forecast visualization
-    elif is_forecast:
+    if is_forecast:
         return create_forecast_chart(company_data, company)
-    
+
     # If specific metrics were identified
-    elif metrics and metrics != ['all']:
-        columns = [metric_map.get(metric) for metric in metrics if metric in metric_map and metric_map.get(metric)]
+    if metrics and metrics != ['all']:
+        columns = [_METRIC_MAP[metric] for metric in metrics if metric in _METRIC_MAP]
         if columns:
-            title = f"{company} - Selected Financial Metrics"
-            fig = create_interactive_chart(company_data, 'line', columns)
-            return fig
-    
+            return create_interactive_chart(company_data, 'line', columns)
+
     # Default visualization - financial overview
-    title = f"{company} - Financial Overview"
-    fig = px.line(company_data, x="Fiscal Year", 
-                  y=["Total Revenue (in millions)", "Net Income (in millions)", 
-                     "Cash Flow from Operating Activities (in millions)"],
-                  title=title,
-                  markers=True,
-                  labels={"value": "Amount (in millions $)", "variable": "Metric"})
-    return fig
+    return _viz_overview(company_data, company, f"{company} - Financial Overview")
@@ -184,25 +184,41 @@ def get_yfinance_data(tickers, period="2y"):
         print(f"Error in yfinance data retrieval: {str(e)}")
         return None
 
-def analyze_data(df):
-    """Process and analyze the financial data"""
+def enrich_financial_data(df):
+    """Return a copy of the data with growth and ratio columns added.
+
+    Kept separate from analyze_data so callers can cache and store the
+    enriched frame itself; relying on in-place mutation breaks as soon as
+    analyze_data sits behind a cache, because cache hits skip the side
+    effect and the stored frame loses the derived columns.
+    """
+    df = df.copy()
+
     # Calculate growth rates
     df['Revenue Growth (%)'] = df.groupby(['Company'])['Total Revenue (in millions)'].pct_change() * 100
     df['Net Income Growth (%)'] = df.groupby(['Company'])['Net Income (in millions)'].pct_change() * 100
     df['Asset Growth (%)'] = df.groupby(['Company'])['Total Assets (in millions)'].pct_change() * 100
     df['Liability Growth (%)'] = df.groupby(['Company'])['Total Liabilities (in millions)'].pct_change() * 100
     df['Cash Flow Growth (%)'] = df.groupby(['Company'])['Cash Flow from Operating Activities (in millions)'].pct_change() * 100
-    
+
     # Calculate additional financial metrics
     # ROA - Return on Assets
     df['ROA (%)'] = (df['Net Income (in millions)'] / df['Total Assets (in millions)']) * 100
-    
+
     # Profit Margin
     df['Profit Margin (%)'] = (df['Net Income (in millions)'] / df['Total Revenue (in millions)']) * 100
-    
+
     # Debt-to-Asset Ratio
     df['Debt-to-Asset Ratio'] = df['Total Liabilities (in millions)'] / df['Total Assets (in millions)']
-    
+
+    return df
+
+def analyze_data(df):
+    """Process and analyze the financial data"""
+    # Add the derived columns unless the caller already enriched the frame
+    if 'Revenue Growth (%)' not in df.columns:
+        df = enrich_financial_data(df)
+
     # Group by Company and calculate summary statistics
     analysis_data = {}
     